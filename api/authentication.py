@@ -0,0 +1,109 @@
+import copy
+import time
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from cinema.models import Author, Spectator, User
+from cinema.routers import is_recent_writer, pin_primary
+
+# user id => (expiry, user), see `API_USER_CACHE_TIMEOUT`
+_users = {}
+
+
+def get_concrete_user(user_id):
+    """
+    Loads the user with its `Spectator` / `Author` row in a single joined
+    query, and returns the most specific of the three.
+    """
+    user = User.objects.select_related("spectator", "author").get(
+        **{api_settings.USER_ID_FIELD: user_id}
+    )
+
+    for child in ("spectator", "author"):
+        try:
+            return getattr(user, child)
+        except (Spectator.DoesNotExist, Author.DoesNotExist):
+            continue
+
+    return user
+
+
+def get_cached_user(user_id):
+    """
+    `get_concrete_user` behind a per-process cache of
+    `API_USER_CACHE_TIMEOUT` seconds. Saving a user clears its entry in the
+    current process only: other processes may serve it until it expires.
+    """
+    timeout = settings.API_USER_CACHE_TIMEOUT
+    if not timeout:
+        return get_concrete_user(user_id)
+
+    now = time.monotonic()
+    entry = _users.get(user_id)
+    if entry is None or entry[0] < now:
+        entry = _users[user_id] = (now + timeout, get_concrete_user(user_id))
+
+    # Never share an instance between requests
+    return copy.deepcopy(entry[1])
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def clear_cached_user(sender, instance, **kwargs):
+    if isinstance(instance, User):
+        _users.pop(getattr(instance, api_settings.USER_ID_FIELD), None)
+
+
+class ConcreteUserJWTAuthentication(JWTAuthentication):
+    """
+    `JWTAuthentication` setting `request.user` to the `Spectator` or `Author`
+    instance of the token user, fetched with the same single query. Views
+    then get the spectator without any additional query, see
+    `api.viewsets.get_spectator_from_request`.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+        try:
+            user = get_cached_user(user_id)
+        except User.DoesNotExist as e:
+            raise AuthenticationFailed(
+                _("User not found"), code="user_not_found"
+            ) from e
+
+        # Same checks as `JWTAuthentication.get_user`
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(
+                _("User is inactive"), code="user_inactive"
+            )
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."),
+                    code="password_changed",
+                )
+
+        # Read-your-writes, see `cinema.middleware`
+        if is_recent_writer(user.pk):
+            pin_primary()
+
+        return user
@@ -0,0 +1,228 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+
+from cinema.cache import (
+    aget_generations,
+    aget_last_modified,
+    arecord_hit,
+    arecord_miss,
+    get_generations,
+    get_last_modified,
+    record_hit,
+    record_miss,
+)
+from cinema.routers import use_primary
+
+
+# Raised by a lookup value the field can't convert, e.g. `/movies/abc/`
+STAMPS_LOOKUP_ERRORS = (ValueError, TypeError, ValidationError)
+
+
+def set_validators(response, etag, last_modified=None):
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+class CachedListMixin:
+    """
+    Caches `list` responses data, keyed on the absolute URL (so the
+    hyperlinks rendered for another host are never served) and on the
+    generation of every model in `cache_models`.
+
+    Saving or deleting one of those models bumps its generation (see
+    `cinema.signals`), which makes every previously cached page unreachable
+    at once; stale entries then simply expire.
+
+    List payloads don't depend on the requesting user, cached pages are
+    shared between anonymous and authenticated requests.
+
+    Pages are filled from the primary: a replica may not have the write that
+    bumped the generation yet, its page would be cached as the new one.
+    """
+
+    cache_models = ()
+
+    def make_list_cache_key(self, request, generations):
+        params = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in values
+        )
+        url = request.build_absolute_uri(request.path)
+        digest = hashlib.md5(
+            f"{url}?{params}".encode(), usedforsecurity=False
+        ).hexdigest()
+        generations = ".".join(str(generation) for generation in generations)
+        return f"api:list:{self.basename}:{generations}:{digest}"
+
+    def get_list_cache_key(self, request):
+        return self.make_list_cache_key(
+            request, get_generations(*self.cache_models)
+        )
+
+    async def aget_list_cache_key(self, request):
+        return self.make_list_cache_key(
+            request, await aget_generations(*self.cache_models)
+        )
+
+    def list(self, request, *args, **kwargs):
+        key = self.get_list_cache_key(request)
+
+        data = cache.get(key)
+        if data is not None:
+            record_hit(self.basename)
+            response = Response(data)
+            response["X-Cache"] = "HIT"
+            return response
+
+        record_miss(self.basename)
+        with use_primary():
+            response = super().list(request, *args, **kwargs)
+
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.API_LIST_CACHE_TIMEOUT)
+
+        response["X-Cache"] = "MISS"
+        return response
+
+    async def alist(self, request, *args, **kwargs):
+        key = await self.aget_list_cache_key(request)
+
+        data = await cache.aget(key)
+        if data is not None:
+            await arecord_hit(self.basename)
+            response = Response(data)
+            response["X-Cache"] = "HIT"
+            return response
+
+        await arecord_miss(self.basename)
+        with use_primary():
+            response = await super().alist(request, *args, **kwargs)
+
+        if response.status_code == status.HTTP_200_OK:
+            await cache.aset(
+                key, response.data, settings.API_LIST_CACHE_TIMEOUT
+            )
+
+        response["X-Cache"] = "MISS"
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    Answers `If-None-Match` / `If-Modified-Since` with a 304 on `retrieve` and
+    `list` (and their async variants, see `api.viewsets.AsyncReadMixin`),
+    before any serializer or related query runs.
+
+    - `retrieve` validators come from the object `version` & `updated_at`
+      stamps (see `cinema.models.VersionedModel`), fetched with a single
+      narrow query.
+    - `list` validators come from the list cache key, which changes with the
+      `cache_models` generations (see `CachedListMixin`).
+
+    ETags also depend on `get_variant()`: the representations a URL serves
+    (e.g. JSON & MessagePack, see `Vary: Accept`) never share one.
+    """
+
+    def get_variant(self):
+        """
+        Returns what, besides the resource, selects the response body.
+        """
+        return self.request.accepted_renderer.format
+
+    def get_stamps_queryset(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return self.queryset.filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        ).values_list("version", "updated_at")
+
+    def get_object_validators(self):
+        try:
+            stamps = self.get_stamps_queryset().first()
+        except STAMPS_LOOKUP_ERRORS:
+            # Invalid lookup value, `get_object` answers the 404
+            return None
+        if stamps is None:
+            return None
+
+        return self.make_validators(*stamps)
+
+    async def aget_object_validators(self):
+        try:
+            stamps = await self.get_stamps_queryset().afirst()
+        except STAMPS_LOOKUP_ERRORS:
+            return None
+        if stamps is None:
+            return None
+
+        return self.make_validators(*stamps)
+
+    def make_validators(self, version, updated_at):
+        etag = (
+            f"{self.basename}-{version}-{updated_at.timestamp():.6f}-"
+            f"{self.get_variant()}"
+        )
+        return quote_etag(etag), int(updated_at.timestamp())
+
+    def retrieve(self, request, *args, **kwargs):
+        validators = self.get_object_validators()
+        if validators is not None:
+            response = get_conditional_response(request, *validators)
+            if response is not None:
+                return set_validators(response, *validators)
+
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        return set_validators(
+            Response(serializer.data),
+            *self.make_validators(instance.version, instance.updated_at),
+        )
+
+    async def aretrieve(self, request, *args, **kwargs):
+        validators = await self.aget_object_validators()
+        if validators is not None:
+            response = get_conditional_response(request, *validators)
+            if response is not None:
+                return set_validators(response, *validators)
+
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        return set_validators(
+            Response(serializer.data),
+            *self.make_validators(instance.version, instance.updated_at),
+        )
+
+    def make_list_etag(self, cache_key):
+        digest = hashlib.md5(
+            f"{cache_key}:{self.get_variant()}".encode(), usedforsecurity=False
+        ).hexdigest()
+        return quote_etag(digest)
+
+    def list(self, request, *args, **kwargs):
+        etag = self.make_list_etag(self.get_list_cache_key(request))
+        last_modified = get_last_modified(*self.cache_models)
+
+        response = get_conditional_response(request, etag, last_modified)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+
+        return set_validators(response, etag, last_modified)
+
+    async def alist(self, request, *args, **kwargs):
+        etag = self.make_list_etag(await self.aget_list_cache_key(request))
+        last_modified = await aget_last_modified(*self.cache_models)
+
+        response = get_conditional_response(request, etag, last_modified)
+        if response is None:
+            response = await super().alist(request, *args, **kwargs)
+
+        return set_validators(response, etag, last_modified)
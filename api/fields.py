@@ -0,0 +1,54 @@
+from rest_framework import serializers
+from rest_framework.reverse import reverse
+
+
+class UrlTemplate:
+    """
+    Absolute URL of `view_name` resolved once, with a placeholder in place of
+    the lookup value: building the URL of a given object is then a plain
+    string concatenation instead of a `reverse()` + `build_absolute_uri()`.
+    """
+
+    # Numeric, so that it matches any lookup pattern or path converter, and
+    # long enough not to collide with anything else in the URL.
+    placeholder = "9081726354453627189"
+
+    def __init__(self, view_name, request, format=None, lookup_url_kwarg="pk"):
+        self.request = request
+        self.format = format
+
+        url = reverse(
+            view_name,
+            kwargs={lookup_url_kwarg: self.placeholder},
+            request=request,
+            format=format,
+        )
+        self.prefix, _, self.suffix = url.partition(self.placeholder)
+
+    def matches(self, request, format):
+        return self.request is request and self.format == format
+
+    def format_url(self, value):
+        return f"{self.prefix}{value}{self.suffix}"
+
+
+class TemplatedHyperlinkedIdentityField(serializers.HyperlinkedIdentityField):
+    """
+    `HyperlinkedIdentityField` producing the same URLs, with the URL template
+    resolved once per request (see `UrlTemplate`) rather than once per row.
+    """
+
+    def get_url(self, obj, view_name, request, format):
+        lookup_value = getattr(obj, self.lookup_field)
+
+        # Other values would need to be quoted like `reverse()` does
+        if not isinstance(lookup_value, int):
+            return super().get_url(obj, view_name, request, format)
+
+        template = getattr(self, "_url_template", None)
+        if template is None or not template.matches(request, format):
+            template = self._url_template = UrlTemplate(
+                view_name, request, format, self.lookup_url_kwarg
+            )
+
+        return template.format_url(lookup_value)
@@ -1,6 +1,11 @@
+from django import forms
+from django.db.models import Exists, OuterRef
+from django_filters import rest_framework as filters
 from rest_framework.exceptions import ValidationError
 
-from cinema.models import CreationSource
+from cinema.models import Author, CreationSource, Movie, MovieStatus
+
+MovieAuthors = Movie.authors.through
 
 
 class CreationSourceFilterMixin:
@@ -26,3 +31,74 @@ class CreationSourceFilterMixin:
             )
 
         return qs.filter(creation_source=param)
+
+
+class IntegerFilter(filters.NumberFilter):
+    # `NumberFilter` parses decimals, which integer columns would truncate
+    field_class = forms.IntegerField
+
+
+class IntegerInFilter(filters.BaseInFilter, IntegerFilter):
+    pass
+
+
+class ChoiceInFilter(filters.BaseInFilter, filters.ChoiceFilter):
+    pass
+
+
+class MovieFilterSet(filters.FilterSet):
+    """
+    `/movies/` filters. Every one compiles to a plain comparison on an
+    indexed column (or an indexed subquery), see `Movie.Meta.indexes`:
+
+    - `release_date_after` / `release_date_before`: inclusive dates
+    - `status`: comma separated statuses
+    - `evaluation_min` / `evaluation_max`: inclusive evaluation bounds
+    - `authors`: comma separated author ids, movies of any of them
+    - `has_tmdb`: `true` for movies populated from TMDB
+    """
+
+    release_date = filters.DateFromToRangeFilter()
+    status = ChoiceInFilter(choices=MovieStatus.choices)
+    evaluation_min = IntegerFilter(field_name="evaluation", lookup_expr="gte")
+    evaluation_max = IntegerFilter(field_name="evaluation", lookup_expr="lte")
+    authors = IntegerInFilter(method="filter_authors")
+    has_tmdb = filters.BooleanFilter(method="filter_has_tmdb")
+
+    class Meta:
+        model = Movie
+        fields = ()
+
+    def filter_authors(self, queryset, name, value):
+        # A semi-join on the M2M `author_id` index, rather than a join
+        # duplicating movies having several of the authors
+        return queryset.filter(
+            pk__in=MovieAuthors.objects.filter(author_id__in=value).values(
+                "movie_id"
+            )
+        )
+
+    def filter_has_tmdb(self, queryset, name, value):
+        return queryset.filter(tmdb_id__isnull=not value)
+
+
+class AuthorFilterSet(filters.FilterSet):
+    """
+    `/authors/` filters, see `Author.Meta.indexes`:
+
+    - `birth_day_after` / `birth_day_before`: inclusive dates
+    - `death_day_after` / `death_day_before`: inclusive dates
+    - `has_movies`: `true` for authors of at least one movie
+    """
+
+    birth_day = filters.DateFromToRangeFilter()
+    death_day = filters.DateFromToRangeFilter()
+    has_movies = filters.BooleanFilter(method="filter_has_movies")
+
+    class Meta:
+        model = Author
+        fields = ()
+
+    def filter_has_movies(self, queryset, name, value):
+        movies = Exists(MovieAuthors.objects.filter(author_id=OuterRef("pk")))
+        return queryset.filter(movies if value else ~movies)
@@ -0,0 +1,249 @@
+import binascii
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import reduce
+from operator import and_, or_
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _after(field, value, descending):
+    """
+    Rows strictly after `value` for `field` in the given direction, following
+    PostgreSQL's default NULL placement (NULLS LAST for ASC, NULLS FIRST for
+    DESC). Returns `None` when no row can come after `value`.
+    """
+    if descending:
+        if value is None:
+            return Q(**{f"{field}__isnull": False})
+        return Q(**{f"{field}__lt": value})
+
+    if value is None:
+        return None
+    return Q(**{f"{field}__gt": value}) | Q(**{f"{field}__isnull": True})
+
+
+def _equal(field, value):
+    if value is None:
+        return Q(**{f"{field}__isnull": True})
+    return Q(**{field: value})
+
+
+def _field_value(obj, field):
+    if isinstance(obj, dict):
+        # `.values()` rows
+        return obj[field]
+
+    for attr in field.split("__"):
+        obj = getattr(obj, attr)
+    return obj
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (a.k.a. "seek") pagination on the queryset ordering, with a
+    tie-break on `id`.
+
+    Unlike `PageNumberPagination` it never runs `SELECT COUNT(*)` nor an
+    `OFFSET`: the cursor carries the ordering values of the boundary row and
+    the next page is fetched with a `WHERE (title, release_date, id) > (...)`
+    style predicate, which a matching composite index serves in constant
+    time whatever the page depth.
+    """
+
+    page_size = PageNumberPagination.page_size
+    cursor_query_param = "cursor"
+    tie_break_field = "id"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(queryset, view)
+        self.base_url = request.build_absolute_uri()
+
+        position, self.reverse = self.decode_cursor(request)
+
+        if self.reverse:
+            # Walk backwards by inverting every direction, then restore the
+            # natural order of the page.
+            queryset = queryset.order_by(
+                *(f if desc else f"-{f}" for f, desc in self.ordering)
+            )
+        else:
+            queryset = queryset.order_by(
+                *(f"-{f}" if desc else f for f, desc in self.ordering)
+            )
+
+        if position is not None:
+            queryset = queryset.filter(self.seek(position))
+
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+
+        if self.reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        return self.page
+
+    def get_ordering(self, queryset, view):
+        """
+        Returns `(field, descending)` pairs from the queryset ordering (as
+        set by `OrderingFilter` or the view `ordering`), with the `id`
+        tie-break appended so that every position is unique.
+        """
+        ordering = list(queryset.query.order_by) or list(
+            getattr(view, "ordering", None) or []
+        )
+
+        pairs = []
+        for field in ordering:
+            if not isinstance(field, str):
+                raise NotFound("Ordering not supported by cursor pagination")
+
+            descending = field.startswith("-")
+            field = field.lstrip("-")
+            pairs.append(("id" if field == "pk" else field, descending))
+
+        if self.tie_break_field not in {field for field, _ in pairs}:
+            pairs.append((self.tie_break_field, False))
+
+        return pairs
+
+    def seek(self, position):
+        """
+        Builds `(a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z)`
+        for the current ordering. Mixed ASC/DESC directions rule out a single
+        row-value comparison, the expanded form is still served by the
+        composite index.
+        """
+        clauses = []
+        for index, (field, descending) in enumerate(self.ordering):
+            after = _after(field, position[index], descending ^ self.reverse)
+            if after is None:
+                continue
+
+            equals = [
+                _equal(prev_field, position[prev_index])
+                for prev_index, (prev_field, _) in enumerate(
+                    self.ordering[:index]
+                )
+            ]
+            clauses.append(reduce(and_, equals, after))
+
+        if not clauses:
+            return Q(pk__in=[])
+
+        return reduce(or_, clauses)
+
+    def get_position(self, obj):
+        return [_field_value(obj, field) for field, _ in self.ordering]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            data = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            position, reverse = data["p"], bool(data["r"])
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or len(position) != len(
+            self.ordering
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+        return position, reverse
+
+    def encode_cursor(self, position, reverse):
+        data = json.dumps(
+            {"p": position, "r": int(reverse)},
+            cls=DjangoJSONEncoder,
+            separators=(",", ":"),
+        )
+        encoded = urlsafe_b64encode(data.encode("utf-8")).decode("ascii")
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+
+        return self.encode_cursor(self.get_position(self.page[-1]), False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+
+        return self.encode_cursor(self.get_position(self.page[0]), True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {
+                    "type": "string",
+                    "nullable": True,
+                    "format": "uri",
+                },
+                "results": schema,
+            },
+        }
+
+
+class PageNumberOrKeysetPagination(PageNumberPagination):
+    """
+    Default page number pagination, with an opt-in keyset mode enabled by
+    `?pagination=cursor` (kept in the `next`/`previous` links) or by any
+    `?cursor=` parameter.
+    """
+
+    mode_query_param = "pagination"
+    keyset_pagination_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+
+        params = request.query_params
+        if (
+            params.get(self.mode_query_param) == "cursor"
+            or self.keyset_pagination_class.cursor_query_param in params
+        ):
+            self.keyset = self.keyset_pagination_class()
+            self.keyset.page_size = self.get_page_size(request)
+            return self.keyset.paginate_queryset(queryset, request, view)
+
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+
+        return super().get_paginated_response(data)
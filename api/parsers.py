@@ -0,0 +1,18 @@
+import msgpack
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class MessagePackParser(BaseParser):
+    """
+    Parses `application/msgpack` request bodies, see
+    `api.renderers.MessagePackRenderer`.
+    """
+
+    media_type = "application/msgpack"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read())
+        except (ValueError, msgpack.ExtraData) as exc:
+            raise ParseError(f"MessagePack parse error - {exc}")
@@ -0,0 +1,143 @@
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db.models import Prefetch, Q
+
+from cinema.models import Author, Movie
+
+# Columns actually read by each serializer. `only()` keeps the SELECT list
+# (and for `Author`, the columns pulled from the `cinema_user` parent table
+# through multi-table inheritance) down to what gets rendered.
+MOVIE_LIST_FIELDS = ("id", "title", "release_date")
+MOVIE_DETAILS_FIELDS = (
+    "id",
+    "title",
+    "description",
+    "release_date",
+    "status",
+    "evaluation",
+    "imdb_id",
+    "evaluations_count",
+    "score_sum",
+    "score_avg",
+    # Conditional GET validators
+    "version",
+    "updated_at",
+)
+
+AUTHOR_LIST_FIELDS = ("id", "first_name", "last_name")
+AUTHOR_DETAILS_FIELDS = (
+    "id",
+    "first_name",
+    "last_name",
+    "biography",
+    "imdb_id",
+    "birth_day",
+    "death_day",
+    "evaluations_count",
+    "score_sum",
+    "score_avg",
+    # Conditional GET validators
+    "version",
+    "updated_at",
+)
+
+# Columns needed by details serializer fields not backed by a column of the
+# same name, see `SparseFieldsMixin`. Conditional GET validators are always
+# loaded.
+VALIDATOR_FIELDS = ("id", "version", "updated_at")
+MOVIE_FIELD_COLUMNS = {"imdb_page": ("imdb_id",)}
+AUTHOR_FIELD_COLUMNS = {
+    "full_name": ("first_name", "last_name"),
+    "imdb_page": ("imdb_id",),
+}
+
+# Columns of the NDJSON exports, see `api.views.ExportView`
+MOVIE_EXPORT_FIELDS = (
+    "id",
+    "title",
+    "original_title",
+    "description",
+    "release_date",
+    "status",
+    "evaluation",
+    "budget",
+    "imdb_id",
+    "tmdb_id",
+    "evaluations_count",
+    "score_avg",
+    "updated_at",
+)
+AUTHOR_EXPORT_FIELDS = (
+    "id",
+    "first_name",
+    "last_name",
+    "biography",
+    "birth_day",
+    "death_day",
+    "imdb_id",
+    "tmdb_id",
+    "evaluations_count",
+    "score_avg",
+    "updated_at",
+)
+
+MOVIE_ORDERING = ("title", "-release_date")
+AUTHOR_ORDERING = ("last_name", "first_name")
+
+
+def prefetch_movie_authors():
+    """
+    Prefetch `Movie.authors` in a single query, projected on the columns
+    used by `AuthorListSerializer`.
+    """
+    return Prefetch(
+        "authors",
+        queryset=Author.objects.only(*AUTHOR_LIST_FIELDS).order_by(
+            *AUTHOR_ORDERING
+        ),
+    )
+
+
+def prefetch_author_movies():
+    """
+    Prefetch `Author.movies` in a single query, projected on the columns
+    used by `MovieListSerializer`.
+    """
+    return Prefetch(
+        "movies",
+        queryset=Movie.objects.only(*MOVIE_LIST_FIELDS).order_by(
+            *MOVIE_ORDERING
+        ),
+    )
+
+
+def _linked_ids(relation):
+    return ArrayAgg(
+        f"{relation}__id",
+        filter=Q(**{f"{relation}__isnull": False}),
+        order_by=f"{relation}__id",
+        default=[],
+    )
+
+
+def export_movies():
+    """
+    Movies export rows, with the ids of their authors aggregated in the same
+    query.
+    """
+    return (
+        Movie.objects.values(*MOVIE_EXPORT_FIELDS)
+        .annotate(authors=_linked_ids("authors"))
+        .order_by("id")
+    )
+
+
+def export_authors():
+    """
+    Authors export rows, with the ids of their movies aggregated in the same
+    query.
+    """
+    return (
+        Author.objects.values(*AUTHOR_EXPORT_FIELDS)
+        .annotate(movies=_linked_ids("movies"))
+        .order_by("id")
+    )
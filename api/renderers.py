@@ -0,0 +1,83 @@
+import msgpack
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Types orjson and msgpack don't handle natively (or, for datetimes, handle
+# differently) are converted like DRF's `JSONRenderer` does, so that every
+# format encodes them the same way, e.g. dates as ISO 8601 strings.
+_encoder = JSONEncoder()
+
+
+class OrjsonRenderer(JSONRenderer):
+    """
+    Drop-in `JSONRenderer` encoding with orjson, several times faster on big
+    pages, with the same compact UTF-8 output.
+
+    Pretty printing (`; indent=` media type parameter or the browsable API)
+    and data orjson can't encode (e.g. integers over 64 bits) fall back to
+    `JSONRenderer`. Only floats written with an exponent differ (`1e-7` vs
+    `1e-07`), API floats (scores, averages) never are.
+    """
+
+    options = (
+        orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data, default=_encoder.default, option=self.options
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same escaping as `JSONRenderer`, for JavaScript compatibility
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+class NdjsonRenderer(OrjsonRenderer):
+    """
+    `application/x-ndjson` renderer, encoding `data` as one line of JSON.
+
+    Streamed exports write their rows themselves, it lets clients ask for
+    them by their media type.
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        return super().render(data, renderer_context=renderer_context) + b"\n"
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    `application/msgpack` renderer, for internal services asking for it
+    with an `Accept` header or `?format=msgpack`.
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        return msgpack.packb(data, default=_encoder.default)
@@ -1,8 +1,13 @@
+from django.db import transaction
 from rest_framework import serializers
 
+from api.fields import TemplatedHyperlinkedIdentityField, UrlTemplate
+
 from cinema.models import (
     Author,
+    AuthorRanking,
     Movie,
+    MovieRanking,
     Spectator,
     SpectatorAuthorEvaluation,
     SpectatorMovieEvaluation,
@@ -10,7 +15,7 @@ from cinema.models import (
 
 
 class MovieListSerializer(serializers.ModelSerializer):
-    details = serializers.HyperlinkedIdentityField(
+    details = TemplatedHyperlinkedIdentityField(
         view_name="movie-detail", lookup_field="pk"
     )
 
@@ -20,7 +25,7 @@ class MovieListSerializer(serializers.ModelSerializer):
 
 
 class AuthorListSerializer(serializers.ModelSerializer):
-    details = serializers.HyperlinkedIdentityField(
+    details = TemplatedHyperlinkedIdentityField(
         view_name="author-detail", lookup_field="pk"
     )
 
@@ -29,7 +34,83 @@ class AuthorListSerializer(serializers.ModelSerializer):
         fields = ["id", "full_name", "details"]
 
 
-class AuthorDetailsSerializer(serializers.ModelSerializer):
+class ValuesSerializer(serializers.BaseSerializer):
+    """
+    Read-only serializer working on `QuerySet.values(*values_fields)` rows,
+    building each representation dict directly instead of resolving fields
+    on model instances.
+
+    Subclasses must produce exactly the same output as the `ModelSerializer`
+    they stand for.
+    """
+
+    values_fields = ()
+
+    def detail_url(self, view_name, pk):
+        # Same URL as `HyperlinkedIdentityField(view_name, lookup_field="pk")`
+        request = self.context["request"]
+        format = self.context.get("format")
+
+        templates = getattr(self, "_url_templates", None)
+        if templates is None:
+            templates = self._url_templates = {}
+
+        template = templates.get(view_name)
+        if template is None or not template.matches(request, format):
+            template = templates[view_name] = UrlTemplate(
+                view_name, request, format
+            )
+
+        return template.format_url(pk)
+
+
+class MovieListValuesSerializer(ValuesSerializer):
+    """
+    `.values()` based counterpart of `MovieListSerializer`
+    """
+
+    values_fields = ("id", "title", "release_date")
+
+    def to_representation(self, row):
+        release_date = row["release_date"]
+        return {
+            "id": row["id"],
+            "title": row["title"],
+            "details": self.detail_url("movie-detail", row["id"]),
+            "release_date": release_date.isoformat() if release_date else None,
+        }
+
+
+class AuthorListValuesSerializer(ValuesSerializer):
+    """
+    `.values()` based counterpart of `AuthorListSerializer`
+    """
+
+    values_fields = ("id", "first_name", "last_name")
+
+    def to_representation(self, row):
+        return {
+            "id": row["id"],
+            # Same as `User.full_name`
+            "full_name": f"{row['first_name']} {row['last_name']}",
+            "details": self.detail_url("author-detail", row["id"]),
+        }
+
+
+class SparseFieldsMixin:
+    """
+    Only outputs the fields named in the `fields` init argument, when given.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class AuthorDetailsSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     movies = MovieListSerializer(many=True, read_only=True)
 
     class Meta:
@@ -44,11 +125,14 @@ class AuthorDetailsSerializer(serializers.ModelSerializer):
             "imdb_id",
             "birth_day",
             "death_day",
+            "evaluations_count",
+            "score_avg",
+            "score_sum",
             "movies",
         ]
 
 
-class MovieDetailsSerializer(serializers.ModelSerializer):
+class MovieDetailsSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     authors = AuthorListSerializer(many=True, read_only=True)
 
     class Meta:
@@ -62,10 +146,29 @@ class MovieDetailsSerializer(serializers.ModelSerializer):
             "evaluation",
             "imdb_id",
             "imdb_page",
+            "evaluations_count",
+            "score_avg",
+            "score_sum",
             "authors",
         ]
 
 
+class MovieRankingSerializer(serializers.ModelSerializer):
+    movie = MovieListSerializer(read_only=True)
+
+    class Meta:
+        model = MovieRanking
+        fields = ["rank", "score", "movie"]
+
+
+class AuthorRankingSerializer(serializers.ModelSerializer):
+    author = AuthorListSerializer(read_only=True)
+
+    class Meta:
+        model = AuthorRanking
+        fields = ["rank", "score", "author"]
+
+
 class RegisterSpectatorSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=8)
 
@@ -101,6 +204,63 @@ class CreateFavoriteAuthorSerializer(serializers.Serializer):
     )
 
 
+class BulkFavoritesSerializer(serializers.Serializer):
+    """
+    Ids to `add` to and/or `remove` from the favorites, or the full `set` of
+    favorites replacing the current ones. Added ids are checked with a
+    single query.
+    """
+
+    model = None
+    max_ids = 10000
+
+    add = serializers.ListField(
+        child=serializers.IntegerField(), required=False, max_length=max_ids
+    )
+    remove = serializers.ListField(
+        child=serializers.IntegerField(), required=False, max_length=max_ids
+    )
+    set = serializers.ListField(
+        child=serializers.IntegerField(), required=False, max_length=max_ids
+    )
+
+    def validate(self, attrs):
+        if "set" in attrs:
+            if "add" in attrs or "remove" in attrs:
+                raise serializers.ValidationError(
+                    "`set` can't be combined with `add` or `remove`"
+                )
+            ids = set(attrs["set"])
+        elif "add" in attrs or "remove" in attrs:
+            ids = set(attrs.get("add", []))
+            if ids & set(attrs.get("remove", [])):
+                raise serializers.ValidationError(
+                    "Ids can't be both added and removed"
+                )
+        else:
+            raise serializers.ValidationError(
+                "One of `add`, `remove` or `set` is required"
+            )
+
+        found = self.model.objects.filter(pk__in=ids)
+        missing = ids - set(found.values_list("pk", flat=True))
+        if missing:
+            field = "set" if "set" in attrs else "add"
+            raise serializers.ValidationError(
+                {field: f"Unknown ids: {sorted(missing)}"}
+            )
+
+        return attrs
+
+
+class BulkFavoriteMoviesSerializer(BulkFavoritesSerializer):
+    model = Movie
+
+
+class BulkFavoriteAuthorsSerializer(BulkFavoritesSerializer):
+    model = Author
+
+
 class SpectatorMovieEvaluationSerializer(serializers.ModelSerializer):
     class Meta:
         model = SpectatorMovieEvaluation
@@ -113,3 +273,95 @@ class SpectatorAuthorEvaluationSerializer(serializers.ModelSerializer):
         model = SpectatorAuthorEvaluation
         fields = ["id", "author", "spectator", "score", "comment"]
         read_only_fields = ["author", "spectator"]
+
+
+class BulkEvaluationListSerializer(serializers.ListSerializer):
+    """
+    Checks that every evaluated object exists with a single query, instead of
+    one `PrimaryKeyRelatedField` lookup per item.
+    """
+
+    def validate(self, attrs):
+        model = self.child.Meta.model
+        target_field = model._meta.get_field(model.target_field)
+
+        ids = {item[target_field.attname] for item in attrs}
+        found = target_field.related_model.objects.filter(pk__in=ids)
+        missing = ids - set(found.values_list("pk", flat=True))
+        if missing:
+            raise serializers.ValidationError(
+                f"Unknown {model.target_field} ids: {sorted(missing)}"
+            )
+
+        return attrs
+
+
+class BulkMovieEvaluationSerializer(SpectatorMovieEvaluationSerializer):
+    movie = serializers.IntegerField(source="movie_id")
+
+    class Meta(SpectatorMovieEvaluationSerializer.Meta):
+        fields = ["movie", "score", "comment"]
+        read_only_fields = []
+        list_serializer_class = BulkEvaluationListSerializer
+
+
+class BulkAuthorEvaluationSerializer(SpectatorAuthorEvaluationSerializer):
+    author = serializers.IntegerField(source="author_id")
+
+    class Meta(SpectatorAuthorEvaluationSerializer.Meta):
+        fields = ["author", "score", "comment"]
+        read_only_fields = []
+        list_serializer_class = BulkEvaluationListSerializer
+
+
+class BulkEvaluationsSerializer(serializers.Serializer):
+    """
+    Movies & authors evaluations of a spectator, upserted with one query per
+    model (see `Evaluation.bulk_upsert`). Saving returns the status of each
+    evaluation, in the request order.
+    """
+
+    max_evaluations = 1000
+
+    movies = BulkMovieEvaluationSerializer(
+        many=True, required=False, max_length=max_evaluations
+    )
+    authors = BulkAuthorEvaluationSerializer(
+        many=True, required=False, max_length=max_evaluations
+    )
+
+    def validate(self, attrs):
+        if not attrs.get("movies") and not attrs.get("authors"):
+            raise serializers.ValidationError("No evaluations given")
+
+        return attrs
+
+    @transaction.atomic
+    def create(self, validated_data):
+        spectator = validated_data["spectator"]
+        results = {}
+
+        for name in ("movies", "authors"):
+            serializer = self.fields[name]
+            model = serializer.child.Meta.model
+            attname = model._meta.get_field(model.target_field).attname
+            evaluations = validated_data.get(name, [])
+            results[name] = []
+            if not evaluations:
+                continue
+
+            created = model.bulk_upsert(spectator, evaluations)
+            for evaluation in evaluations:
+                target_id = evaluation[attname]
+                results[name].append(
+                    {
+                        model.target_field: target_id,
+                        "status": "created"
+                        if target_id in created
+                        else "updated",
+                    }
+                )
+                # Any later evaluation of the same object is an update
+                created.discard(target_id)
+
+        return results
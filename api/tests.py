@@ -1,8 +1,51 @@
+import asyncio
+import datetime
+import decimal
+import io
+import uuid
+import warnings
+
+import msgpack
+import orjson
 import pytest
-from rest_framework.test import APIClient
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
 from model_bakery import baker
 
-from cinema.models import Spectator, Movie, Author
+from api.authentication import get_cached_user
+from api.fields import TemplatedHyperlinkedIdentityField
+from api.pagination import PageNumberOrKeysetPagination
+from api.renderers import OrjsonRenderer
+from api.throttling import (
+    AnonRateThrottle,
+    CacheThrottleBackend,
+    SQLiteThrottleBackend,
+)
+from api.viewsets import MovieViewSet
+from cinema.cache import get_stats
+from cinema.models import (
+    Spectator,
+    Movie,
+    MovieRanking,
+    MovieSimilarity,
+    Author,
+    AuthorRanking,
+    SpectatorMovieEvaluation,
+    User,
+    full_name_sort,
+)
+from cinema.recommendations import refresh_similarities
+from cinema.search import has_trigram_extension
+from tmdb.management.commands.tmdb import Command as TmdbCommand
 
 
 def obtain_access_token(
@@ -105,3 +148,1599 @@ def test_favorite_an_author(authenticated_api_client: APIClient):
     # checks properly added to favorites
     resp = authenticated_api_client.get("/api/favorites/authors/")
     assert any(a["id"] == author.id for a in resp.data["results"])
+
+
+# Query budgets: each endpoint must cost a fixed number of queries, whatever
+# the number of related rows.
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", [1, 10])
+def test_list_movies_query_budget(
+    api_client: APIClient, django_assert_num_queries, size
+):
+    baker.make(Movie, _quantity=size)
+
+    # COUNT + page
+    with django_assert_num_queries(2):
+        resp = api_client.get("/api/movies/")
+    assert resp.status_code == 200
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", [1, 10])
+def test_list_authors_query_budget(
+    api_client: APIClient, django_assert_num_queries, size
+):
+    baker.make(Author, _quantity=size)
+
+    # COUNT + page
+    with django_assert_num_queries(2):
+        resp = api_client.get("/api/authors/")
+    assert resp.status_code == 200
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", [1, 10])
+def test_retrieve_movie_query_budget(
+    authenticated_api_client: APIClient, django_assert_num_queries, size
+):
+    movie = baker.make(Movie)
+    movie.authors.set(baker.make(Author, _quantity=size))
+
+    # user + version stamps + movie + authors
+    with django_assert_num_queries(4):
+        resp = authenticated_api_client.get(f"/api/movies/{movie.id}/")
+    assert resp.status_code == 200
+    assert len(resp.data["authors"]) == size
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", [1, 10])
+def test_retrieve_author_query_budget(
+    authenticated_api_client: APIClient, django_assert_num_queries, size
+):
+    author = baker.make(Author)
+    author.movies.set(baker.make(Movie, _quantity=size))
+
+    # user + version stamps + author + movies
+    with django_assert_num_queries(4):
+        resp = authenticated_api_client.get(f"/api/authors/{author.id}/")
+    assert resp.status_code == 200
+    assert len(resp.data["movies"]) == size
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", [1, 10])
+def test_batch_retrieve_movies(
+    authenticated_api_client: APIClient, django_assert_num_queries, size
+):
+    movies = baker.make(Movie, _quantity=size)
+    for movie in movies:
+        movie.authors.set(baker.make(Author, _quantity=2))
+    ids = [movie.id for movie in reversed(movies)]
+
+    url = f"/api/movies/?ids={','.join(map(str, [*ids, 0, ids[0]]))}"
+    # user + movies + authors
+    with django_assert_num_queries(3):
+        resp = authenticated_api_client.get(url)
+    assert resp.status_code == 200
+    assert [movie["id"] for movie in resp.data["results"]] == ids
+    assert all(len(movie["authors"]) == 2 for movie in resp.data["results"])
+    assert resp.data["missing"] == [0]
+
+    # Same representations as `retrieve`, sparse fieldsets included
+    resp = authenticated_api_client.get(f"/api/movies/?ids={ids[0]}")
+    detail = authenticated_api_client.get(f"/api/movies/{ids[0]}/")
+    assert resp.data["results"] == [detail.data]
+    resp = authenticated_api_client.get(
+        f"/api/movies/?ids={ids[0]}&fields=title"
+    )
+    assert resp.data["results"] == [{"title": detail.data["title"]}]
+
+    # Details require authentication
+    resp = APIClient().get(url)
+    assert resp.status_code == 401
+
+
+@pytest.mark.django_db
+def test_batch_retrieve_authors(authenticated_api_client: APIClient, settings):
+    settings.API_BATCH_MAX_IDS = 2
+    first, second = baker.make(Author, _quantity=2)
+
+    resp = authenticated_api_client.get(
+        f"/api/authors/?ids={second.id},{first.id}"
+    )
+    assert [author["id"] for author in resp.data["results"]] == [
+        second.id,
+        first.id,
+    ]
+    assert resp.data["missing"] == []
+
+    for ids in ("", "1,two", "1,2,3"):
+        resp = authenticated_api_client.get(f"/api/authors/?ids={ids}")
+        assert resp.status_code == 400
+        assert "ids" in resp.data
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", [1, 10])
+def test_movies_by_year_query_budget(
+    authenticated_api_client: APIClient, django_assert_num_queries, size
+):
+    baker.make(Movie, release_date="2012-06-01", _quantity=size)
+
+    # user + COUNT + page
+    with django_assert_num_queries(3):
+        resp = authenticated_api_client.get("/api/movies/by-year/2012/")
+    assert resp.status_code == 200
+    assert len(resp.data["results"]) == size
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", [1, 10])
+def test_list_favorites_query_budget(
+    spectator: Spectator,
+    authenticated_api_client: APIClient,
+    django_assert_num_queries,
+    size,
+):
+    spectator.favorite_movies.set(baker.make(Movie, _quantity=size))
+    spectator.favorite_authors.set(baker.make(Author, _quantity=size))
+
+    # user & spectator + COUNT + page
+    with django_assert_num_queries(3):
+        resp = authenticated_api_client.get("/api/favorites/movies/")
+    assert resp.status_code == 200
+    assert resp.data["count"] == size
+
+    with django_assert_num_queries(3):
+        resp = authenticated_api_client.get("/api/favorites/authors/")
+    assert resp.status_code == 200
+    assert resp.data["count"] == size
+
+
+def walk_cursor_pages(client: APIClient, url: str):
+    """
+    Follows `next` links from `url` and returns every page's results.
+    """
+    pages = []
+    while url:
+        resp = client.get(url)
+        assert resp.status_code == 200, resp.content
+        assert "count" not in resp.data
+        pages.append(resp.data["results"])
+        url = resp.data["next"]
+    return pages
+
+
+@pytest.mark.django_db
+def test_list_movies_cursor_pagination(api_client: APIClient, monkeypatch):
+    monkeypatch.setattr(PageNumberOrKeysetPagination, "page_size", 2)
+
+    # Duplicated titles and a NULL release date exercise the tie-breaks
+    for index in range(5):
+        baker.make(
+            Movie,
+            title=f"Movie {index % 2}",
+            release_date=None if index == 3 else f"200{index}-01-01",
+        )
+
+    expected = list(
+        Movie.objects.order_by("title", "-release_date", "id").values_list(
+            "id", flat=True
+        )
+    )
+
+    pages = walk_cursor_pages(api_client, "/api/movies/?pagination=cursor")
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [m["id"] for page in pages for m in page] == expected
+
+    # Walking back from the last page returns the same pages
+    resp = api_client.get("/api/movies/?pagination=cursor")
+    resp = api_client.get(resp.data["next"])
+    resp = api_client.get(resp.data["next"])
+    assert resp.data["next"] is None
+    resp = api_client.get(resp.data["previous"])
+    assert [m["id"] for m in resp.data["results"]] == expected[2:4]
+    resp = api_client.get(resp.data["previous"])
+    assert [m["id"] for m in resp.data["results"]] == expected[:2]
+    assert resp.data["previous"] is None
+
+
+@pytest.mark.django_db
+def test_list_authors_cursor_pagination(api_client: APIClient, monkeypatch):
+    monkeypatch.setattr(PageNumberOrKeysetPagination, "page_size", 2)
+
+    for index in range(5):
+        baker.make(Author, last_name="Doe", first_name=f"J{index % 2}")
+
+    expected = list(
+        Author.objects.order_by("last_name", "first_name", "id").values_list(
+            "id", flat=True
+        )
+    )
+
+    pages = walk_cursor_pages(api_client, "/api/authors/?pagination=cursor")
+    assert [a["id"] for page in pages for a in page] == expected
+
+
+@pytest.mark.django_db
+def test_list_movies_cursor_pagination_skips_count(
+    api_client: APIClient, django_assert_num_queries
+):
+    baker.make(Movie, _quantity=3)
+
+    with django_assert_num_queries(1):
+        resp = api_client.get("/api/movies/?pagination=cursor")
+    assert resp.status_code == 200
+
+
+@pytest.mark.django_db
+def test_list_movies_invalid_cursor(api_client: APIClient):
+    resp = api_client.get("/api/movies/?cursor=not-a-cursor")
+    assert resp.status_code == 404
+
+
+@pytest.mark.django_db
+def test_list_movies_filters(
+    api_client: APIClient, authenticated_api_client: APIClient
+):
+    first, second = baker.make(Author, _quantity=2)
+    baker.make(
+        Movie,
+        title="Old",
+        release_date="1950-06-01",
+        status="Released",
+        evaluation=4,
+        tmdb_id=1,
+        authors=[first, second],
+    )
+    new = baker.make(
+        Movie,
+        title="New",
+        release_date="2030-01-01",
+        status="Rumored",
+        evaluation=0,
+        authors=[second],
+    )
+    baker.make(Movie, title="Undated", status="In Production")
+
+    def titles(query):
+        resp = api_client.get(f"/api/movies/?{query}")
+        assert resp.status_code == 200, resp.data
+        return [movie["title"] for movie in resp.data["results"]]
+
+    assert titles("release_date_after=1950-06-01") == ["New", "Old"]
+    assert titles("release_date_before=1950-06-01") == ["Old"]
+    assert (
+        titles("release_date_after=1951-01-01&release_date_before=2029-12-31")
+        == []
+    )
+    assert titles("status=Released,In Production") == ["Old", "Undated"]
+    assert titles("evaluation_min=1") == ["Old"]
+    assert titles("evaluation_max=3") == ["New", "Undated"]
+    # Movies of both authors are listed once
+    assert titles(f"authors={first.id},{second.id}") == ["New", "Old"]
+    assert titles(f"authors={first.id}") == ["Old"]
+    assert titles("has_tmdb=true") == ["Old"]
+    assert titles("has_tmdb=false&status=Rumored") == ["New"]
+
+    # Filters also apply to the other list actions
+    resp = authenticated_api_client.get(
+        "/api/movies/by-year/1950-2030/?status=Rumored"
+    )
+    assert [movie["id"] for movie in resp.data["results"]] == [new.id]
+
+    for query, param in (
+        ("release_date_after=yesterday", "release_date"),
+        ("status=Lost", "status"),
+        ("evaluation_min=2.5", "evaluation_min"),
+        ("authors=first", "authors"),
+    ):
+        resp = api_client.get(f"/api/movies/?{query}")
+        assert resp.status_code == 400, query
+        assert list(resp.data) == [param]
+
+
+@pytest.mark.django_db
+def test_list_authors_filters(api_client: APIClient):
+    alive = baker.make(Author, birth_day="1980-01-01")
+    dead = baker.make(Author, birth_day="1900-01-01", death_day="1970-01-01")
+    movie = baker.make(Movie, authors=[dead])
+
+    def ids(query):
+        resp = api_client.get(f"/api/authors/?{query}")
+        assert resp.status_code == 200, resp.data
+        return [author["id"] for author in resp.data["results"]]
+
+    assert ids("birth_day_after=1950-01-01") == [alive.id]
+    assert ids("birth_day_before=1950-01-01") == [dead.id]
+    assert ids("death_day_after=1900-01-01") == [dead.id]
+    assert ids("has_movies=true") == [dead.id]
+    assert ids("has_movies=false") == [alive.id]
+
+    resp = api_client.get("/api/authors/?death_day_before=never")
+    assert resp.status_code == 400
+
+    # Cached lists are invalidated when authorships cascade
+    movie.delete()
+    assert ids("has_movies=true") == []
+    assert sorted(ids("has_movies=false")) == sorted([alive.id, dead.id])
+
+
+@pytest.mark.django_db
+def test_list_favorite_movies_cursor_pagination(
+    spectator: Spectator, authenticated_api_client: APIClient
+):
+    spectator.favorite_movies.set(baker.make(Movie, _quantity=3))
+
+    pages = walk_cursor_pages(
+        authenticated_api_client, "/api/favorites/movies/?pagination=cursor"
+    )
+    assert len(pages[0]) == 3
+
+
+@pytest.mark.django_db
+def test_movies_by_year(authenticated_api_client: APIClient):
+    baker.make(Movie, release_date="2011-12-31")
+    first = baker.make(Movie, release_date="2012-01-01")
+    last = baker.make(Movie, release_date="2012-12-31")
+    baker.make(Movie, release_date="2013-01-01")
+    baker.make(Movie, release_date=None)
+
+    resp = authenticated_api_client.get("/api/movies/by-year/2012/")
+    assert resp.status_code == 200
+    assert resp.data["count"] == 2
+    assert {m["id"] for m in resp.data["results"]} == {first.id, last.id}
+
+
+@pytest.mark.django_db
+def test_movies_by_year_range(authenticated_api_client: APIClient):
+    baker.make(Movie, release_date="1989-12-31")
+    movies = [
+        baker.make(Movie, release_date="1990-01-01"),
+        baker.make(Movie, release_date="1995-06-15"),
+        baker.make(Movie, release_date="1999-12-31"),
+    ]
+    baker.make(Movie, release_date="2000-01-01")
+
+    resp = authenticated_api_client.get("/api/movies/by-year/1990-1999/")
+    assert resp.status_code == 200
+    assert {m["id"] for m in resp.data["results"]} == {m.id for m in movies}
+
+
+@pytest.mark.django_db
+def test_movies_by_year_invalid_range(authenticated_api_client: APIClient):
+    resp = authenticated_api_client.get("/api/movies/by-year/1999-1990/")
+    assert resp.status_code == 400
+
+
+@pytest.mark.django_db
+def test_list_movies_is_cached(
+    api_client: APIClient, django_assert_num_queries
+):
+    movie = baker.make(Movie, title="Cached")
+
+    resp = api_client.get("/api/movies/")
+    assert resp["X-Cache"] == "MISS"
+
+    with django_assert_num_queries(0):
+        resp = api_client.get("/api/movies/")
+    assert resp["X-Cache"] == "HIT"
+    assert resp.data["results"][0]["title"] == "Cached"
+
+    # Other query params are cached separately
+    resp = api_client.get("/api/movies/?creation_source=tmdb")
+    assert resp["X-Cache"] == "MISS"
+    assert resp.data["count"] == 0
+
+    # Any change on movies invalidates cached pages
+    movie.title = "Updated"
+    movie.save()
+    resp = api_client.get("/api/movies/")
+    assert resp["X-Cache"] == "MISS"
+    assert resp.data["results"][0]["title"] == "Updated"
+
+    movie.delete()
+    resp = api_client.get("/api/movies/")
+    assert resp["X-Cache"] == "MISS"
+    assert resp.data["count"] == 0
+
+    assert get_stats("movie") == {"hits": 1, "misses": 4}
+
+
+@pytest.mark.django_db
+def test_list_authors_cache_invalidation(api_client: APIClient):
+    author = baker.make(Author, first_name="Jane", last_name="Doe")
+    movie = baker.make(Movie)
+
+    api_client.get("/api/authors/")
+    resp = api_client.get("/api/authors/")
+    assert resp["X-Cache"] == "HIT"
+
+    author.first_name = "John"
+    author.save()
+    resp = api_client.get("/api/authors/")
+    assert resp["X-Cache"] == "MISS"
+    assert resp.data["results"][0]["full_name"] == "John Doe"
+
+    # Linking movies invalidates both movies & authors pages
+    api_client.get("/api/movies/")
+    author.movies.add(movie)
+    assert api_client.get("/api/authors/")["X-Cache"] == "MISS"
+    assert api_client.get("/api/movies/")["X-Cache"] == "MISS"
+
+
+@pytest.mark.django_db
+def test_retrieve_movie_conditional_get(
+    authenticated_api_client: APIClient, django_assert_num_queries
+):
+    movie = baker.make(Movie)
+    author = baker.make(Author, first_name="Jane")
+    movie.authors.add(author)
+
+    resp = authenticated_api_client.get(f"/api/movies/{movie.id}/")
+    assert resp.status_code == 200
+    etag = resp["ETag"]
+    last_modified = resp["Last-Modified"]
+
+    # user + version stamps, no serialization nor authors query
+    with django_assert_num_queries(2):
+        resp = authenticated_api_client.get(
+            f"/api/movies/{movie.id}/", HTTP_IF_NONE_MATCH=etag
+        )
+    assert resp.status_code == 304
+    assert resp["ETag"] == etag
+
+    resp = authenticated_api_client.get(
+        f"/api/movies/{movie.id}/", HTTP_IF_MODIFIED_SINCE=last_modified
+    )
+    assert resp.status_code == 304
+
+    # Editing an embedded author changes the movie representation
+    author.first_name = "John"
+    author.save()
+    resp = authenticated_api_client.get(
+        f"/api/movies/{movie.id}/", HTTP_IF_NONE_MATCH=etag
+    )
+    assert resp.status_code == 200
+    assert resp["ETag"] != etag
+    etag = resp["ETag"]
+
+    # So does changing the authors links, on both sides
+    author.movies.remove(movie)
+    resp = authenticated_api_client.get(
+        f"/api/movies/{movie.id}/", HTTP_IF_NONE_MATCH=etag
+    )
+    assert resp.status_code == 200
+    assert resp.data["authors"] == []
+
+
+@pytest.mark.django_db
+def test_conditional_get_etags_per_format(authenticated_api_client: APIClient):
+    movie = baker.make(Movie)
+
+    for url in (f"/api/movies/{movie.id}/", "/api/movies/"):
+        json_etag = authenticated_api_client.get(url)["ETag"]
+        resp = authenticated_api_client.get(
+            url, HTTP_ACCEPT="application/msgpack"
+        )
+        assert resp["ETag"] != json_etag
+
+        # A JSON validator never selects the MessagePack body
+        resp = authenticated_api_client.get(
+            url, HTTP_ACCEPT="application/msgpack", HTTP_IF_NONE_MATCH=json_etag
+        )
+        assert resp.status_code == 200
+        assert resp["Content-Type"] == "application/msgpack"
+
+
+@pytest.mark.django_db
+def test_retrieve_author_conditional_get(authenticated_api_client: APIClient):
+    author = baker.make(Author)
+
+    resp = authenticated_api_client.get(f"/api/authors/{author.id}/")
+    etag = resp["ETag"]
+
+    resp = authenticated_api_client.get(
+        f"/api/authors/{author.id}/", HTTP_IF_NONE_MATCH=etag
+    )
+    assert resp.status_code == 304
+
+    movie = baker.make(Movie)
+    movie.authors.add(author)
+    resp = authenticated_api_client.get(
+        f"/api/authors/{author.id}/", HTTP_IF_NONE_MATCH=etag
+    )
+    assert resp.status_code == 200
+    assert len(resp.data["movies"]) == 1
+
+
+@pytest.mark.django_db
+def test_retrieve_invalid_pk_not_found(authenticated_api_client: APIClient):
+    for url in ("/api/movies/abc/", "/api/authors/abc/"):
+        resp = authenticated_api_client.get(url, HTTP_IF_NONE_MATCH='"x"')
+        assert resp.status_code == 404
+
+    view = MovieViewSet(kwargs={"pk": "abc"}, basename="movie")
+    assert view.get_object_validators() is None
+
+
+@pytest.mark.django_db
+def test_list_movies_conditional_get(api_client: APIClient):
+    baker.make(Movie)
+
+    resp = api_client.get("/api/movies/")
+    etag = resp["ETag"]
+
+    resp = api_client.get("/api/movies/", HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 304
+
+    # Different pages have different validators
+    resp = api_client.get("/api/movies/?page=1", HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 200
+
+    baker.make(Movie)
+    resp = api_client.get("/api/movies/", HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 200
+    assert resp.data["count"] == 2
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/api/movies/",
+        "/api/movies/?pagination=cursor",
+        "/api/authors/",
+        "/api/favorites/movies/",
+        "/api/favorites/authors/",
+        "/api/movies/by-year/2012/",
+    ],
+)
+def test_fast_list_serializers_output(
+    spectator: Spectator,
+    authenticated_api_client: APIClient,
+    settings,
+    url,
+):
+    movies = baker.make(Movie, release_date="2012-01-01", _quantity=3)
+    movies.append(baker.make(Movie, release_date=None))
+    authors = baker.make(Author, _quantity=3)
+    spectator.favorite_movies.set(movies)
+    spectator.favorite_authors.set(authors)
+
+    settings.API_FAST_LIST_SERIALIZERS = False
+    expected = authenticated_api_client.get(url)
+    assert expected.status_code == 200
+
+    cache.clear()
+    settings.API_FAST_LIST_SERIALIZERS = True
+    resp = authenticated_api_client.get(url)
+    assert resp.status_code == 200
+    assert resp.content == expected.content
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("format", [None, "json"])
+@pytest.mark.parametrize("host", ["testserver", "api.example.com:8080"])
+def test_templated_hyperlinks(settings, format, host):
+    settings.ALLOWED_HOSTS = [host.split(":")[0], "testserver"]
+    request = Request(APIRequestFactory().get("/api/movies/", HTTP_HOST=host))
+
+    field = serializers.HyperlinkedIdentityField(view_name="movie-detail")
+    templated = TemplatedHyperlinkedIdentityField(view_name="movie-detail")
+    context = {"request": request, "format": format}
+    field.bind("details", serializers.Serializer(context=context))
+    templated.bind("details", serializers.Serializer(context=context))
+
+    for movie in baker.make(Movie, _quantity=3):
+        assert templated.to_representation(movie) == field.to_representation(
+            movie
+        )
+
+
+@pytest.fixture
+def search_catalog(db):
+    nolan = baker.make(
+        Author,
+        first_name="Christopher",
+        last_name="Nolan",
+        biography="British director of Interstellar",
+    )
+    interstellar = baker.make(
+        Movie,
+        title="Interstellar",
+        description="Explorers travel through a wormhole in space",
+    )
+    interstellar.authors.add(nolan)
+    baker.make(Movie, title="Heat", description="A thief running from LA cops")
+    return {"nolan": nolan, "interstellar": interstellar}
+
+
+@pytest.mark.django_db
+def test_search(api_client: APIClient, search_catalog):
+    resp = api_client.get("/api/search/?q=interstellar")
+    assert resp.status_code == 200
+    assert resp.data["count"] == 2
+
+    # Title matches rank above biography matches
+    movie, author = resp.data["results"]
+    assert movie == {
+        "type": "movie",
+        "id": search_catalog["interstellar"].id,
+        "title": "Interstellar",
+        "details": f"http://testserver/api/movies/{search_catalog['interstellar'].id}/",
+        "release_date": None,
+    }
+    assert author["type"] == "author"
+    assert author["full_name"] == "Christopher Nolan"
+
+    # Stemmed matches on descriptions
+    resp = api_client.get("/api/search/?q=runs")
+    assert [m["title"] for m in resp.data["results"]] == ["Heat"]
+
+
+@pytest.mark.django_db
+def test_search_by_type(api_client: APIClient, search_catalog):
+    resp = api_client.get("/api/search/?q=interstellar&type=author")
+    assert resp.status_code == 200
+    assert [a["id"] for a in resp.data["results"]] == [
+        search_catalog["nolan"].id
+    ]
+
+    resp = api_client.get("/api/search/?q=interstellar&type=spectator")
+    assert resp.status_code == 400
+
+
+@pytest.mark.django_db
+def test_search_requires_text(api_client: APIClient):
+    resp = api_client.get("/api/search/?q=")
+    assert resp.status_code == 400
+
+
+@pytest.mark.django_db
+def test_search_author_vector_follows_updates(
+    api_client: APIClient, search_catalog
+):
+    nolan = search_catalog["nolan"]
+    nolan.last_name = "Nolanski"
+    nolan.save()
+
+    resp = api_client.get("/api/search/?q=nolanski&type=author")
+    assert [a["id"] for a in resp.data["results"]] == [nolan.id]
+
+
+@pytest.mark.django_db
+def test_search_tolerates_typos(api_client: APIClient, search_catalog):
+    if not has_trigram_extension():
+        pytest.skip("pg_trgm extension is not available")
+
+    resp = api_client.get("/api/search/?q=intersteller&type=movie")
+    assert [m["title"] for m in resp.data["results"]] == ["Interstellar"]
+
+
+@pytest.mark.django_db
+def test_evaluation_aggregates(
+    authenticated_api_client: APIClient, spectator: Spectator
+):
+    movie = baker.make(Movie)
+    other = baker.make(Spectator, username="other")
+    baker.make(SpectatorMovieEvaluation, movie=movie, spectator=other, score=80)
+
+    resp = authenticated_api_client.post(
+        f"/api/movies/{movie.id}/evaluate/", {"score": 40}
+    )
+    assert resp.status_code == 201
+    movie.refresh_from_db()
+    assert (movie.evaluations_count, movie.score_sum) == (2, 120)
+    assert movie.score_avg == 60
+
+    # Score change through `update_or_create`
+    resp = authenticated_api_client.post(
+        f"/api/movies/{movie.id}/evaluate/", {"score": 60}
+    )
+    assert resp.status_code == 200
+    resp = authenticated_api_client.get(f"/api/movies/{movie.id}/")
+    assert resp.data["evaluations_count"] == 2
+    assert resp.data["score_sum"] == 140
+    assert resp.data["score_avg"] == 70
+
+    SpectatorMovieEvaluation.objects.get(spectator=other).delete()
+    movie.refresh_from_db()
+    assert (movie.evaluations_count, movie.score_sum) == (1, 60)
+
+    spectator.movies_evaluations.all().delete()
+    movie.refresh_from_db()
+    assert (movie.evaluations_count, movie.score_sum) == (0, 0)
+    assert movie.score_avg is None
+
+
+@pytest.mark.django_db
+def test_recompute_evaluations_repairs_drift():
+    movie, untouched = baker.make(Movie, _quantity=2)
+    baker.make(SpectatorMovieEvaluation, movie=movie, score=30)
+    baker.make(SpectatorMovieEvaluation, movie=movie, score=50)
+    Movie.objects.filter(pk=movie.pk).update(
+        evaluations_count=7, score_sum=1, score_avg=None
+    )
+
+    assert Movie.recompute_evaluations() == 1
+    movie.refresh_from_db()
+    assert (movie.evaluations_count, movie.score_sum) == (2, 80)
+    assert movie.score_avg == 40
+
+    call_command("recompute_evaluations")
+    assert Movie.recompute_evaluations() == 0
+
+
+@pytest.mark.django_db
+def test_movies_leaderboards(
+    api_client: APIClient, settings, django_assert_num_queries
+):
+    settings.LEADERBOARD_PRIOR_WEIGHT = 2
+    spectators = baker.make(Spectator, _quantity=4)
+    lucky, solid, old = (
+        baker.make(Movie, title="Lucky", release_date="2020-01-01"),
+        baker.make(Movie, title="Solid", release_date="2020-06-01"),
+        baker.make(Movie, title="Old", release_date="1990-01-01"),
+    )
+    # A single perfect score doesn't beat many good ones
+    baker.make(SpectatorMovieEvaluation, movie=lucky, score=100)
+    for spectator in spectators:
+        baker.make(
+            SpectatorMovieEvaluation, movie=solid, spectator=spectator, score=90
+        )
+    baker.make(SpectatorMovieEvaluation, movie=old, score=10)
+    spectators[0].favorite_movies.add(old, lucky)
+    spectators[1].favorite_movies.add(old)
+
+    MovieRanking.refresh()
+
+    with django_assert_num_queries(2):
+        resp = api_client.get("/api/movies/top/")
+    assert resp.status_code == 200
+    assert [r["movie"]["title"] for r in resp.data["results"]] == [
+        "Solid",
+        "Lucky",
+        "Old",
+    ]
+    assert resp.data["results"][0]["rank"] == 1
+
+    resp = api_client.get("/api/movies/top/?year=2020&by=evaluations")
+    assert [r["movie"]["title"] for r in resp.data["results"]] == [
+        "Solid",
+        "Lucky",
+    ]
+    assert [r["score"] for r in resp.data["results"]] == [4, 1]
+
+    resp = api_client.get("/api/movies/top/?by=favorites")
+    assert [r["movie"]["title"] for r in resp.data["results"]] == [
+        "Old",
+        "Lucky",
+    ]
+
+    assert api_client.get("/api/movies/top/?by=nope").status_code == 400
+
+
+@pytest.mark.django_db
+def test_authors_leaderboards(api_client: APIClient):
+    author = baker.make(Author, username="author")
+    baker.make(Spectator).favorite_authors.add(author)
+    AuthorRanking.refresh()
+
+    resp = api_client.get("/api/authors/top/?by=favorites")
+    assert resp.status_code == 200
+    assert [r["author"]["id"] for r in resp.data["results"]] == [author.id]
+    assert api_client.get("/api/authors/top/?year=2020").status_code == 400
+
+
+@pytest.fixture
+def co_favorites(db):
+    alien, aliens, prometheus, amelie = (
+        baker.make(Movie, title=title)
+        for title in ("Alien", "Aliens", "Prometheus", "Amelie")
+    )
+    for spectator in baker.make(Spectator, _quantity=3):
+        spectator.favorite_movies.add(alien, aliens)
+    fan = baker.make(Spectator)
+    fan.favorite_movies.add(alien, prometheus)
+    baker.make(SpectatorMovieEvaluation, spectator=fan, movie=amelie, score=0)
+    return alien, aliens, prometheus, amelie
+
+
+@pytest.mark.django_db
+def test_similar_movies(authenticated_api_client: APIClient, co_favorites):
+    alien, aliens, prometheus, amelie = co_favorites
+    assert refresh_similarities() == 4
+
+    resp = authenticated_api_client.get(f"/api/movies/{alien.id}/similar/")
+    assert resp.status_code == 200
+    # Amelie's bad score makes it dissimilar
+    assert [m["title"] for m in resp.data["results"]] == [
+        "Aliens",
+        "Prometheus",
+    ]
+
+    # Nothing changed, nothing to refresh
+    assert refresh_similarities() == 0
+
+    # Only the movies sharing spectators with the changed ones are refreshed
+    other = baker.make(Movie, title="Other")
+    baker.make(Spectator).favorite_movies.add(other)
+    assert refresh_similarities() == 1
+
+    Spectator.objects.filter(favorite_movies=prometheus).get().delete()
+    refresh_similarities()
+    assert not MovieSimilarity.objects.filter(movie=prometheus).exists()
+    resp = authenticated_api_client.get(f"/api/movies/{alien.id}/similar/")
+    assert [m["title"] for m in resp.data["results"]] == ["Aliens"]
+
+
+@pytest.mark.django_db
+def test_recommended_movies(
+    authenticated_api_client: APIClient, spectator: Spectator, co_favorites
+):
+    alien, aliens, prometheus, amelie = co_favorites
+    spectator.favorite_movies.add(aliens)
+    refresh_similarities()
+
+    resp = authenticated_api_client.get("/api/favorites/movies/recommended/")
+    assert resp.status_code == 200
+    # Prometheus is only similar to Alien, which isn't a favorite
+    assert [m["title"] for m in resp.data["results"]] == ["Alien"]
+
+
+@pytest.mark.django_db
+def test_similar_and_recommended_cursor_pagination(
+    authenticated_api_client: APIClient,
+    spectator: Spectator,
+    co_favorites,
+    settings,
+    monkeypatch,
+):
+    # Ordered on annotations, which the fast path must keep for the cursors
+    settings.API_FAST_LIST_SERIALIZERS = True
+    monkeypatch.setattr(PageNumberOrKeysetPagination, "page_size", 1)
+    alien, aliens, prometheus, amelie = co_favorites
+    spectator.favorite_movies.add(alien)
+    refresh_similarities()
+
+    for url in (
+        f"/api/movies/{alien.id}/similar/?pagination=cursor",
+        "/api/favorites/movies/recommended/?pagination=cursor",
+    ):
+        pages = walk_cursor_pages(authenticated_api_client, url)
+        assert [m["title"] for page in pages for m in page] == [
+            "Aliens",
+            "Prometheus",
+        ]
+
+
+@pytest.mark.django_db
+def test_bulk_evaluations(
+    authenticated_api_client: APIClient,
+    spectator: Spectator,
+    django_assert_max_num_queries,
+):
+    movies = baker.make(Movie, _quantity=3)
+    author = baker.make(Author, username="author")
+    baker.make(
+        SpectatorMovieEvaluation, spectator=spectator, movie=movies[0], score=10
+    )
+
+    payload = {
+        "movies": [
+            {"movie": movies[0].id, "score": 50},
+            {"movie": movies[1].id, "score": 70, "comment": "Good"},
+            {"movie": movies[2].id, "score": 20},
+            {"movie": movies[2].id, "score": 30},
+        ],
+        "authors": [{"author": author.id, "score": 90}],
+    }
+    # Doesn't grow with the number of evaluations
+    with django_assert_max_num_queries(20):
+        resp = authenticated_api_client.post(
+            "/api/evaluations/bulk/", payload, format="json"
+        )
+    assert resp.status_code == 200, resp.data
+    assert resp.data == {
+        "movies": [
+            {"movie": movies[0].id, "status": "updated"},
+            {"movie": movies[1].id, "status": "created"},
+            {"movie": movies[2].id, "status": "created"},
+            {"movie": movies[2].id, "status": "updated"},
+        ],
+        "authors": [{"author": author.id, "status": "created"}],
+    }
+
+    scores = dict(spectator.movies_evaluations.values_list("movie_id", "score"))
+    assert scores == {movies[0].id: 50, movies[1].id: 70, movies[2].id: 30}
+    for movie, score in zip(movies, (50, 70, 30)):
+        movie.refresh_from_db()
+        assert (movie.evaluations_count, movie.score_sum) == (1, score)
+    author.refresh_from_db()
+    assert author.score_avg == 90
+
+
+@pytest.mark.django_db
+def test_bulk_upsert_evaluations_iterator(spectator: Spectator):
+    movies = baker.make(Movie, _quantity=2)
+    Movie.objects.update(similarities_stale=False)
+
+    created = SpectatorMovieEvaluation.bulk_upsert(
+        spectator,
+        ({"movie_id": movie.id, "score": 50} for movie in movies),
+    )
+    assert created == {movie.id for movie in movies}
+    assert Movie.objects.filter(similarities_stale=True).count() == 2
+
+
+@pytest.mark.django_db
+def test_bulk_evaluations_validation(authenticated_api_client: APIClient):
+    movie = baker.make(Movie)
+    resp = authenticated_api_client.post(
+        "/api/evaluations/bulk/",
+        {
+            "movies": [
+                {"movie": movie.id, "score": 50},
+                {"movie": movie.id + 1, "score": 50},
+            ]
+        },
+        format="json",
+    )
+    assert resp.status_code == 400
+    assert str(movie.id + 1) in str(resp.data["movies"])
+
+    resp = authenticated_api_client.post(
+        "/api/evaluations/bulk/",
+        {"movies": [{"movie": movie.id, "score": 500}]},
+        format="json",
+    )
+    assert resp.status_code == 400
+    assert not movie.evaluations.exists()
+
+
+@pytest.mark.django_db
+def test_bulk_favorite_movies(
+    authenticated_api_client: APIClient,
+    spectator: Spectator,
+    django_assert_max_num_queries,
+):
+    movies = baker.make(Movie, _quantity=50)
+    ids = [movie.id for movie in movies]
+    spectator.favorite_movies.add(*ids[:5])
+
+    # Doesn't grow with the number of ids
+    with django_assert_max_num_queries(12):
+        resp = authenticated_api_client.post(
+            "/api/favorites/movies/bulk/",
+            {"add": ids[5:], "remove": ids[:2]},
+            format="json",
+        )
+    assert resp.status_code == 204
+    favorites = spectator.favorite_movies.values_list("pk", flat=True)
+    assert set(favorites.all()) == set(ids[2:])
+
+    resp = authenticated_api_client.post(
+        "/api/favorites/movies/bulk/", {"set": ids[:3]}, format="json"
+    )
+    assert resp.status_code == 204
+    assert set(favorites.all()) == set(ids[:3])
+
+    resp = authenticated_api_client.post(
+        "/api/favorites/movies/bulk/",
+        {"add": [ids[-1], ids[-1] + 1]},
+        format="json",
+    )
+    assert resp.status_code == 400
+    assert set(favorites.all()) == set(ids[:3])
+
+
+@pytest.mark.django_db
+def test_bulk_favorite_authors(
+    authenticated_api_client: APIClient, spectator: Spectator
+):
+    authors = baker.make(Author, _quantity=3)
+    resp = authenticated_api_client.post(
+        "/api/favorites/authors/bulk/",
+        {"set": [author.id for author in authors]},
+        format="json",
+    )
+    assert resp.status_code == 204
+    assert spectator.favorite_authors.count() == 3
+
+    resp = authenticated_api_client.post(
+        "/api/favorites/authors/bulk/",
+        {"set": [], "add": [authors[0].id]},
+        format="json",
+    )
+    assert resp.status_code == 400
+
+
+@pytest.mark.django_db
+def test_authenticated_spectator_single_query(
+    authenticated_api_client: APIClient, django_assert_num_queries
+):
+    movie = baker.make(Movie)
+    # user & spectator + movie + favorites lookup + insert + similarities flag
+    with django_assert_num_queries(5):
+        resp = authenticated_api_client.post(
+            "/api/favorites/movies/", {"movie_id": movie.id}
+        )
+    assert resp.status_code == 204
+
+
+@pytest.mark.django_db
+def test_authenticated_user_cache(
+    spectator: Spectator,
+    authenticated_api_client: APIClient,
+    settings,
+    django_assert_num_queries,
+):
+    settings.API_USER_CACHE_TIMEOUT = 60
+    authenticated_api_client.get("/api/favorites/movies/")
+
+    # COUNT only, the user comes from the cache
+    with django_assert_num_queries(1):
+        resp = authenticated_api_client.get("/api/favorites/movies/")
+    assert resp.status_code == 200
+
+    spectator.first_name = "Changed"
+    spectator.save()
+    assert get_cached_user(spectator.id).first_name == "Changed"
+
+
+@pytest.mark.parametrize(
+    "backend",
+    [
+        "api.throttling.SQLiteThrottleBackend",
+        "api.throttling.CacheThrottleBackend",
+    ],
+)
+def test_sliding_window_throttle(settings, monkeypatch, backend):
+    settings.API_THROTTLE_BACKEND = backend
+
+    class Throttle(AnonRateThrottle):
+        rate = "4/min"
+
+    now = 600.0
+    monkeypatch.setattr(Throttle, "timer", lambda self: now)
+    request = Request(APIRequestFactory().get("/api/movies/"))
+
+    def allowed():
+        return Throttle().allow_request(request, None)
+
+    assert [allowed() for _ in range(5)] == [True] * 4 + [False]
+
+    # Half way through the next window, half of the previous one counts
+    now += 90
+    assert [allowed() for _ in range(3)] == [True, True, False]
+    throttle = Throttle()
+    assert not throttle.allow_request(request, None)
+    assert 0 < throttle.wait() <= 30
+
+    now += 60
+    assert allowed()
+
+
+@pytest.mark.parametrize(
+    "backend_class", [SQLiteThrottleBackend, CacheThrottleBackend]
+)
+def test_throttle_backend_counters(tmp_path, backend_class):
+    if backend_class is SQLiteThrottleBackend:
+        backend = backend_class(tmp_path / "throttle.sqlite3")
+    else:
+        backend = backend_class()
+
+    assert backend.get("key") == 0
+    assert backend.incr("key", 1, 60) == 1
+    assert backend.incr("key", 2, 60) == 3
+    assert backend.incr("key", -1, 60) == 2
+    assert backend.get("key") == 2
+
+    # Expired counters start over
+    assert backend.incr("expired", 5, -1) == 5
+    assert backend.incr("expired", 1, 60) == 1
+
+    if backend_class is SQLiteThrottleBackend:
+        backend.clear()
+        assert backend.get("key") == 0
+    else:
+        # Would wipe the whole cache along with the counters
+        with pytest.raises(NotImplementedError):
+            backend.clear()
+
+
+@pytest.mark.django_db
+def test_retrieve_movie_sparse_fields(
+    authenticated_api_client: APIClient, django_assert_num_queries
+):
+    movie = baker.make(Movie, title="Sparse", description="Long text")
+    movie.authors.set(baker.make(Author, _quantity=2))
+    url = f"/api/movies/{movie.id}/"
+
+    # user + version stamps + movie, no authors prefetch
+    with django_assert_num_queries(3) as queries:
+        resp = authenticated_api_client.get(f"{url}?fields=title,imdb_page")
+    assert resp.data == {"title": "Sparse", "imdb_page": movie.imdb_page}
+    assert "description" not in queries.captured_queries[-1]["sql"]
+
+    resp = authenticated_api_client.get(f"{url}?fields=id&expand=authors")
+    assert set(resp.data) == {"id", "authors"}
+    assert len(resp.data["authors"]) == 2
+
+    # Each selection has its own ETag
+    etag = authenticated_api_client.get(url)["ETag"]
+    resp = authenticated_api_client.get(
+        f"{url}?fields=id", HTTP_IF_NONE_MATCH=etag
+    )
+    assert resp.status_code == 200
+    assert resp["ETag"] != etag
+    resp = authenticated_api_client.get(
+        f"{url}?fields=id", HTTP_IF_NONE_MATCH=resp["ETag"]
+    )
+    assert resp.status_code == 304
+
+    resp = authenticated_api_client.get(f"{url}?expand=")
+    assert "authors" not in resp.data
+    assert resp.data["description"] == "Long text"
+
+    resp = authenticated_api_client.get(f"{url}?fields=nope&expand=title")
+    assert resp.status_code == 400
+    assert set(resp.data) == {"fields", "expand"}
+
+
+@pytest.mark.django_db
+def test_retrieve_author_sparse_fields(authenticated_api_client: APIClient):
+    author = baker.make(Author, first_name="Roy", last_name="Andersson")
+    author.movies.set(baker.make(Movie, _quantity=2))
+
+    resp = authenticated_api_client.get(
+        f"/api/authors/{author.id}/?fields=full_name,movies"
+    )
+    assert resp.data["full_name"] == "Roy Andersson"
+    assert len(resp.data["movies"]) == 2
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"title": "Amélie", "text": "line\u2028separator\u2029", "n": None},
+        [{"id": 1, "score": 62.5, "ok": True}, {"id": 2, "score": 0.0001234}],
+        {
+            "date": datetime.date(2012, 11, 9),
+            "datetime": datetime.datetime(
+                2012, 11, 9, 10, 30, 15, 123456, tzinfo=datetime.UTC
+            ),
+            "decimal": decimal.Decimal("1.50"),
+            "uuid": uuid.UUID(int=1),
+            1: "int key",
+        },
+        {"big": 2**70},
+    ],
+)
+def test_orjson_renderer_output(data):
+    assert OrjsonRenderer().render(data) == JSONRenderer().render(data)
+
+
+@pytest.mark.django_db
+def test_msgpack_rendering_and_parsing(authenticated_api_client: APIClient):
+    movie = baker.make(Movie, title="Packed", release_date="2012-11-09")
+
+    resp = authenticated_api_client.get(
+        f"/api/movies/{movie.id}/", HTTP_ACCEPT="application/msgpack"
+    )
+    assert resp["Content-Type"] == "application/msgpack"
+    data = msgpack.unpackb(resp.content)
+    assert data["release_date"] == "2012-11-09"
+    assert (
+        data == authenticated_api_client.get(f"/api/movies/{movie.id}/").json()
+    )
+
+    resp = authenticated_api_client.post(
+        f"/api/movies/{movie.id}/evaluate/",
+        msgpack.packb({"score": 80}),
+        content_type="application/msgpack",
+    )
+    assert resp.status_code == 201
+
+
+@pytest.mark.django_db
+def test_ndjson_exports(authenticated_api_client: APIClient, monkeypatch):
+    monkeypatch.setattr("api.views.ExportView.chunk_size", 2)
+    authors = baker.make(Author, _quantity=2)
+    movies = baker.make(Movie, release_date="2012-11-09", _quantity=5)
+    movies[0].authors.set(authors)
+
+    resp = authenticated_api_client.get("/api/export/movies.ndjson")
+    assert resp.status_code == 200
+    assert resp["Content-Type"] == "application/x-ndjson"
+    rows = [orjson.loads(line) for line in resp.getvalue().splitlines()]
+    assert [row["id"] for row in rows] == sorted(movie.id for movie in movies)
+    assert rows[0]["authors"] == sorted(author.id for author in authors)
+    assert rows[0]["release_date"] == "2012-11-09"
+    assert rows[1]["authors"] == []
+
+    resp = authenticated_api_client.get("/api/export/authors.ndjson")
+    rows = [orjson.loads(line) for line in resp.getvalue().splitlines()]
+    assert [row["movies"] for row in rows] == [[movies[0].id]] * 2
+
+    resp = authenticated_api_client.get(
+        "/api/export/movies.ndjson", HTTP_ACCEPT="application/x-ndjson"
+    )
+    assert resp.status_code == 200
+    assert len(resp.getvalue().splitlines()) == 5
+
+
+@pytest.mark.django_db
+def test_ndjson_exports_stream_under_asgi(spectator: Spectator, monkeypatch):
+    monkeypatch.setattr("api.views.ExportView.chunk_size", 2)
+    movies = baker.make(Movie, _quantity=3)
+    token = obtain_access_token(APIClient())
+
+    async def export():
+        client = AsyncClient()
+        resp = await client.get(
+            "/api/export/movies.ndjson",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert resp.is_async
+        return [orjson.loads(line) async for line in resp]
+
+    with warnings.catch_warnings():
+        # Raised when a sync iterator is consumed at once
+        warnings.simplefilter("error")
+        rows = async_to_sync(export)()
+    assert [row["id"] for row in rows] == sorted(movie.id for movie in movies)
+
+
+def test_ndjson_exports_require_auth(api_client: APIClient):
+    assert api_client.get("/api/export/movies.ndjson").status_code == 401
+    resp = api_client.get(
+        "/api/export/movies.ndjson", HTTP_ACCEPT="application/x-ndjson"
+    )
+    assert resp.status_code == 401
+    assert orjson.loads(resp.content)["detail"]
+
+
+@pytest.mark.django_db
+def test_catalog_dump_and_load(tmp_path):
+    authors = [
+        baker.make(Author, username=f"author_{i}", tmdb_id=i, biography="Bio")
+        for i in range(1, 4)
+    ]
+    movies = baker.make(
+        Movie, tmdb_id=iter(range(1, 6)), title="Movie", _quantity=5
+    )
+    movies[0].authors.set(authors)
+    # Not part of the catalog
+    baker.make(Movie, tmdb_id=None)
+
+    out = io.StringIO()
+    call_command("catalog_dump", tmp_path, stdout=out)
+    assert "movies: dumped 5 rows" in out.getvalue()
+    assert {path.name for path in tmp_path.iterdir()} == {
+        "manifest.json",
+        "authors.copy.gz",
+        "movies.copy.gz",
+        "movie_authors.copy.gz",
+    }
+    manifest = orjson.loads((tmp_path / "manifest.json").read_bytes())
+    assert {name: table["rows"] for name, table in manifest.items()} == {
+        "authors": 3,
+        "movies": 5,
+        "movie_authors": 3,
+    }
+
+    Movie.objects.filter(pk=movies[1].pk).update(title="Changed")
+    authors[0].delete()
+    # Takes the username of the deleted author
+    baker.make(Spectator, username="author_1")
+    out = io.StringIO()
+    call_command("catalog_load", tmp_path, stdout=out)
+    assert "movies: loaded 5 rows" in out.getvalue()
+
+    assert Movie.objects.count() == 6
+    assert Author.objects.count() == 3
+    assert Movie.objects.get(pk=movies[1].pk).title == "Movie"
+    restored = Author.objects.get(tmdb_id=1)
+    assert restored.username == "author_1_1"
+    assert restored.biography == "Bio"
+    assert set(movies[0].authors.values_list("tmdb_id", flat=True)) == {
+        1,
+        2,
+        3,
+    }
+    assert Author.objects.filter(search_vector__isnull=False).count() == 3
+
+    # Loaded tables are skipped, unless restarted
+    out = io.StringIO()
+    call_command("catalog_load", tmp_path, stdout=out)
+    assert out.getvalue().count("already loaded") == 3
+    version = Movie.objects.get(pk=movies[2].pk).version
+    call_command("catalog_load", tmp_path, restart=True, stdout=out)
+    assert Movie.objects.count() == 6
+    assert Author.objects.count() == 3
+    assert Movie.authors.through.objects.count() == 3
+    # Unchanged rows aren't touched
+    assert Movie.objects.get(pk=movies[2].pk).version == version
+
+
+@pytest.mark.django_db
+def test_tmdb_linking_bumps_version_stamps():
+    movie = baker.make(Movie, tmdb_id=1)
+    author = baker.make(Author, tmdb_id=2)
+    stamps = (movie.version, author.version)
+
+    TmdbCommand().link_movies_to_authors_by_tmdb_id({1: {2}})
+
+    movie.refresh_from_db()
+    author.refresh_from_db()
+    assert list(movie.authors.all()) == [author]
+    assert (movie.version, author.version) == (stamps[0] + 1, stamps[1] + 1)
+
+
+@pytest.mark.django_db
+def test_async_read_path(spectator: Spectator, api_client: APIClient):
+    assert asyncio.iscoroutinefunction(resolve("/api/movies/").func)
+    assert not asyncio.iscoroutinefunction(resolve("/api/movies/top/").func)
+    movie = baker.make(Movie, title="Async")
+    token = obtain_access_token(api_client)
+    client = AsyncClient()
+    auth = {"Authorization": f"Bearer {token}"}
+
+    resp = async_to_sync(client.get)("/api/movies/")
+    assert resp.status_code == 200
+    assert resp["X-Cache"] == "MISS"
+    assert resp.json()["results"][0]["title"] == "Async"
+    resp = async_to_sync(client.get)("/api/movies/")
+    assert resp["X-Cache"] == "HIT"
+
+    resp = async_to_sync(client.get)(f"/api/movies/{movie.id}/", headers=auth)
+    assert resp.status_code == 200
+    assert resp.json()["title"] == "Async"
+    resp = async_to_sync(client.get)(
+        f"/api/movies/{movie.id}/",
+        headers={**auth, "If-None-Match": resp["ETag"]},
+    )
+    assert resp.status_code == 304
+    resp = async_to_sync(client.get)("/api/movies/0/", headers=auth)
+    assert resp.status_code == 404
+    resp = async_to_sync(client.get)(f"/api/movies/{movie.id}/")
+    assert resp.status_code == 401
+    resp = async_to_sync(client.get)(
+        f"/api/movies/?ids={movie.id}", headers=auth
+    )
+    assert resp.json()["results"][0]["title"] == "Async"
+
+    # Other actions run in a thread
+    resp = async_to_sync(client.patch)(
+        f"/api/movies/{movie.id}/",
+        {"title": "Patched"},
+        content_type="application/json",
+        headers=auth,
+    )
+    assert resp.status_code == 200
+    assert resp.json()["title"] == "Patched"
+    resp = async_to_sync(client.get)("/api/movies/top/", headers=auth)
+    assert resp.status_code == 200
+
+
+@pytest.mark.django_db(transaction=True, databases=["default", "replica"])
+def test_list_cache_filled_from_primary(settings, api_client: APIClient):
+    settings.DATABASE_REPLICAS = ["replica"]
+    # The replica lags behind the write which bumped the generation
+    movie = baker.make(Movie, title="Lagging")
+    movie.save(using="replica")
+    movie.title = "Primary"
+    movie.save()
+
+    with CaptureQueriesContext(connections["replica"]) as queries:
+        resp = api_client.get("/api/movies/")
+    assert resp["X-Cache"] == "MISS"
+    assert resp.data["results"][0]["title"] == "Primary"
+    assert not queries.captured_queries
+
+    resp = api_client.get("/api/movies/")
+    assert resp["X-Cache"] == "HIT"
+    assert resp.data["results"][0]["title"] == "Primary"
+
+
+@pytest.mark.django_db(transaction=True, databases=["default", "replica"])
+def test_replica_routing(settings, spectator: Spectator, api_client: APIClient):
+    settings.DATABASE_REPLICAS = ["replica"]
+    settings.DATABASE_REPLICA_STICKINESS = 60
+    # Replicated rows, the replica lags behind for the movie title
+    spectator.save(using="replica")
+    movie = baker.make(Movie, title="Lagging")
+    movie.save(using="replica")
+    Movie.objects.filter(pk=movie.pk).update(title="Primary")
+
+    # Unsafe requests read from the primary
+    token = obtain_access_token(api_client)
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    resp = api_client.get(f"/api/movies/{movie.id}/")
+    assert resp.data["title"] == "Lagging"
+
+    resp = api_client.post("/api/favorites/movies/", {"movie_id": movie.id})
+    assert resp.status_code == 204
+    assert spectator.favorite_movies.using("default").exists()
+
+    # Read-your-writes
+    resp = api_client.get(f"/api/movies/{movie.id}/")
+    assert resp.data["title"] == "Primary"
+    cache.delete(f"cinema:writer:{spectator.pk}")
+    resp = api_client.get(f"/api/movies/{movie.id}/")
+    assert resp.data["title"] == "Lagging"
+
+
+@pytest.mark.django_db(transaction=True, databases=["default", "replica"])
+def test_commands_read_from_primary(settings, co_favorites):
+    settings.DATABASE_REPLICAS = ["replica"]
+
+    with CaptureQueriesContext(connections["replica"]) as queries:
+        call_command("refresh_similarities", stdout=io.StringIO())
+    assert MovieSimilarity.objects.using("default").exists()
+    assert not queries.captured_queries
+
+    # Other reads do go to the replica
+    with CaptureQueriesContext(connections["replica"]) as queries:
+        list(Movie.objects.all())
+    assert len(queries.captured_queries) == 1
+
+
+@pytest.fixture
+def large_catalog(db):
+    Movie.objects.bulk_create(
+        (
+            Movie(
+                title=f"Movie {i:05}",
+                release_date=datetime.date(1950 + i % 70, 1, 1),
+                creation_source="ADMIN" if i % 20 == 0 else "TMDB",
+                tmdb_id=None if i % 20 == 0 else i,
+                status="Rumored" if i % 50 == 0 else "Released",
+                evaluation=5 if i % 100 == 0 else 3,
+            )
+            for i in range(20_000)
+        ),
+        batch_size=5_000,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO cinema_user (
+                password, is_superuser, username, first_name, last_name,
+                email, is_staff, is_active, date_joined
+            )
+            SELECT '!', false, 'author' || i, 'First' || i, 'Last' || i, '',
+                false, true, now()
+            FROM generate_series(1, 5000) i
+            """
+        )
+        cursor.execute(
+            """
+            INSERT INTO cinema_author (
+                user_ptr_id, imdb_id, biography, creation_source, version,
+                updated_at, evaluations_count, score_sum, birth_day, death_day
+            )
+            SELECT id, '', '',
+                CASE WHEN id % 20 = 0 THEN 'ADMIN' ELSE 'TMDB' END,
+                0, now(), 0, 0, date '1900-01-01' + i * 7,
+                CASE WHEN i % 10 = 0 THEN date '1950-01-01' + i * 5 END
+            FROM cinema_user, CAST(substr(username, 7) AS int) i
+            WHERE username LIKE 'author%'
+            """
+        )
+        # Two authors per movie, among the first 4000 authors
+        cursor.execute(
+            """
+            INSERT INTO cinema_movie_authors (movie_id, author_id)
+            SELECT m.id, first.id + (m.id + shift) % 4000
+            FROM cinema_movie m,
+                (SELECT min(user_ptr_id) AS id FROM cinema_author) first,
+                (VALUES (0), (1)) shifts (shift)
+            """
+        )
+        cursor.execute(
+            "ANALYZE cinema_movie, cinema_user, cinema_author, "
+            "cinema_movie_authors"
+        )
+
+
+def explain(sql, params=None):
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN {sql}", params)
+        return "\n".join(row[0] for row in cursor.fetchall())
+
+
+def test_list_queries_use_indexes(
+    large_catalog, authenticated_api_client: APIClient
+):
+    authors = Author.objects.order_by("pk").values_list("pk", flat=True)
+    for url, table, indexes in [
+        ("/api/movies/", "cinema_movie", {"movie_keyset_idx"}),
+        (
+            "/api/movies/?pagination=cursor",
+            "cinema_movie",
+            {"movie_keyset_idx"},
+        ),
+        # Most movies match: filtering the plain ordering index is as good
+        (
+            "/api/movies/?creation_source=tmdb",
+            "cinema_movie",
+            {"movie_keyset_idx", "movie_source_keyset_idx"},
+        ),
+        (
+            "/api/movies/?creation_source=admin",
+            "cinema_movie",
+            {"movie_source_keyset_idx"},
+        ),
+        (
+            "/api/movies/by-year/1990/",
+            "cinema_movie",
+            {"movie_keyset_idx", "movie_release_date_idx"},
+        ),
+        (
+            "/api/movies/?status=Rumored",
+            "cinema_movie",
+            {"movie_status_keyset_idx"},
+        ),
+        (
+            "/api/movies/?evaluation_min=5",
+            "cinema_movie",
+            {"movie_evaluation_keyset_idx"},
+        ),
+        (
+            "/api/movies/?release_date_after=2018-06-01",
+            "cinema_movie",
+            {"movie_keyset_idx", "movie_release_date_idx"},
+        ),
+        (
+            "/api/movies/?has_tmdb=false",
+            "cinema_movie",
+            {"cinema_movie_tmdb_id_key"},
+        ),
+        (
+            f"/api/movies/?authors={authors[0]},{authors[1]}",
+            "cinema_movie",
+            # The M2M `author_id` index, named with a hash suffix
+            {"cinema_movie_authors_author_id_"},
+        ),
+        ("/api/authors/", "cinema_user", {"user_name_keyset_idx"}),
+        (
+            "/api/authors/?birth_day_before=1901-01-01",
+            "cinema_author",
+            {"author_birth_day_idx"},
+        ),
+        (
+            "/api/authors/?death_day_after=2016-01-01",
+            "cinema_author",
+            {"author_death_day_idx"},
+        ),
+        (
+            "/api/authors/?creation_source=admin",
+            "cinema_author",
+            {"author_admin_idx"},
+        ),
+    ]:
+        with CaptureQueriesContext(connection) as queries:
+            resp = authenticated_api_client.get(url)
+        assert resp.status_code == 200
+
+        # The page query
+        (sql,) = [
+            query["sql"]
+            for query in queries
+            if "ORDER BY" in query["sql"] and "LIMIT" in query["sql"]
+        ]
+        plan = explain(sql)
+        assert any(index in plan for index in indexes), f"{url}\n{plan}"
+        assert f"Seq Scan on {table}" not in plan, f"{url}\n{plan}"
+
+    # Admin "Full name" column sorting
+    queryset = User.objects.annotate(full_name_sort=full_name_sort()).order_by(
+        "full_name_sort", "id"
+    )[:100]
+    plan = explain(*queryset.query.sql_with_params())
+    assert "user_full_name_sort_idx" in plan, plan
@@ -0,0 +1,193 @@
+"""
+Sliding window rate throttling, with counters shared between processes.
+
+DRF's `SimpleRateThrottle` keeps, per client, the list of every request
+timestamp in the window and rewrites it in the cache on each request: with
+`locmem://` each gunicorn worker counts on its own, and the list grows with
+the rate. Here each client only has two counters, for the current & previous
+fixed windows, and the number of requests in the last `duration` seconds is
+estimated as:
+
+    previous * (1 - elapsed fraction of the current window) + current
+
+Counters are stored in a `ThrottleBackend` (see `API_THROTTLE_BACKEND`).
+"""
+
+import random
+import sqlite3
+import threading
+import time
+from functools import cache as memoize
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+from rest_framework import throttling
+
+
+class ThrottleBackend:
+    """
+    Atomic counters expiring after `timeout` seconds.
+    """
+
+    def incr(self, key, delta, timeout):
+        """
+        Adds `delta` to `key` counter (created at 0 if missing or expired)
+        and returns its new value.
+        """
+        raise NotImplementedError
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        """
+        Removes every counter, for tests & benchmarks.
+        """
+        raise NotImplementedError
+
+
+class CacheThrottleBackend(ThrottleBackend):
+    """
+    Counters in the default cache: only shared between processes with a
+    shared cache (e.g. `CACHE_URL=redis://...`), not with `locmem://`.
+
+    No `clear()`: counters can't be told apart from the other cached data
+    (list pages, generations, ...), reset the cache itself instead.
+    """
+
+    prefix = "throttle:"
+
+    def incr(self, key, delta, timeout):
+        key = self.prefix + key
+        cache.add(key, 0, timeout)
+        try:
+            return cache.incr(key, delta)
+        except ValueError:
+            # Expired in between
+            cache.set(key, delta, timeout)
+            return delta
+
+    def get(self, key):
+        return cache.get(self.prefix + key, 0)
+
+
+class SQLiteThrottleBackend(ThrottleBackend):
+    """
+    Counters in a local SQLite file (`API_THROTTLE_SQLITE_PATH`), shared by
+    every worker process of the host without any additional service.
+    """
+
+    # Chance, on each increment, to purge expired counters
+    purge_probability = 0.001
+
+    def __init__(self, path=None):
+        self.path = path or settings.API_THROTTLE_SQLITE_PATH
+        self.local = threading.local()
+
+    @property
+    def connection(self):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS counters ("
+                "key TEXT PRIMARY KEY, value INTEGER NOT NULL, "
+                "expires REAL NOT NULL)"
+            )
+            self.local.connection = connection
+        return connection
+
+    def incr(self, key, delta, timeout):
+        now = time.time()
+        if random.random() < self.purge_probability:
+            self.connection.execute(
+                "DELETE FROM counters WHERE expires < ?", (now,)
+            )
+
+        (value,) = self.connection.execute(
+            "INSERT INTO counters (key, value, expires) VALUES (?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET "
+            "value = CASE WHEN expires < ? THEN excluded.value "
+            "ELSE value + excluded.value END, "
+            "expires = CASE WHEN expires < ? THEN excluded.expires "
+            "ELSE expires END "
+            "RETURNING value",
+            (key, delta, now + timeout, now, now),
+        ).fetchone()
+        return value
+
+    def get(self, key):
+        row = self.connection.execute(
+            "SELECT value FROM counters WHERE key = ? AND expires >= ?",
+            (key, time.time()),
+        ).fetchone()
+        return row[0] if row else 0
+
+    def clear(self):
+        self.connection.execute("DELETE FROM counters")
+
+
+@memoize
+def get_backend(path):
+    return import_string(path)()
+
+
+def get_throttle_backend():
+    return get_backend(settings.API_THROTTLE_BACKEND)
+
+
+class SlidingWindowThrottleMixin:
+    """
+    Replaces `SimpleRateThrottle` history lists by sliding window counters,
+    see the module docstring. Denied requests aren't counted.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        backend = get_throttle_backend()
+        window, self.elapsed = divmod(self.timer() / self.duration, 1)
+        current_key = f"{self.key}:{int(window)}"
+
+        # Counted first so that concurrent requests can't all get through
+        self.current = backend.incr(current_key, 1, 2 * self.duration)
+        self.previous = backend.get(f"{self.key}:{int(window) - 1}")
+
+        if self.estimate() <= self.num_requests:
+            return True
+
+        backend.incr(current_key, -1, 2 * self.duration)
+        self.current -= 1
+        return self.throttle_failure()
+
+    def estimate(self):
+        return self.previous * (1 - self.elapsed) + self.current
+
+    def wait(self):
+        # Requests left to the current window once the previous one is over
+        left = self.num_requests - self.current - 1
+        if left < 0 or not self.previous:
+            # Until the next window
+            return (1 - self.elapsed) * self.duration
+
+        # Until the previous window weight has decayed enough
+        fraction = 1 - left / self.previous
+        return max(fraction - self.elapsed, 0) * self.duration
+
+
+class UserRateThrottle(SlidingWindowThrottleMixin, throttling.UserRateThrottle):
+    pass
+
+
+class AnonRateThrottle(SlidingWindowThrottleMixin, throttling.AnonRateThrottle):
+    pass
@@ -8,7 +8,13 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 
-from api.views import RegisterSpectatorView
+from api.views import (
+    AuthorExportView,
+    BulkEvaluationView,
+    MovieExportView,
+    RegisterSpectatorView,
+    SearchView,
+)
 from api.viewsets import (
     AuthorViewSet,
     FavoriteAuthorsViewSet,
@@ -33,6 +39,12 @@ class ApiRoot(APIRootView):
                 "favorite_authors": reverse(
                     "favorite-author-list", request=request
                 ),
+                "search": reverse("search", request=request),
+                "export_movies": reverse("export-movies", request=request),
+                "export_authors": reverse("export-authors", request=request),
+                "evaluations_bulk": reverse(
+                    "evaluations-bulk", request=request
+                ),
                 "register": reverse("register", request=request),
                 "token_obtain": reverse("token_obtain", request=request),
                 "token_refresh": reverse("token_refresh", request=request),
@@ -65,6 +77,22 @@ urlpatterns = [
         TokenBlacklistView.as_view(),
         name="token_invalidate",
     ),
+    path("search/", SearchView.as_view(), name="search"),
+    path(
+        "evaluations/bulk/",
+        BulkEvaluationView.as_view(),
+        name="evaluations-bulk",
+    ),
+    path(
+        "export/movies.ndjson",
+        MovieExportView.as_view(),
+        name="export-movies",
+    ),
+    path(
+        "export/authors.ndjson",
+        AuthorExportView.as_view(),
+        name="export-authors",
+    ),
     # viewsets routes
     path("", include(api_router.urls)),
 ]
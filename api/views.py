@@ -1,11 +1,178 @@
-from rest_framework.generics import CreateAPIView
-from rest_framework.permissions import AllowAny
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import CreateAPIView, GenericAPIView
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from api.querysets import (
+    AUTHOR_LIST_FIELDS,
+    MOVIE_LIST_FIELDS,
+    export_authors,
+    export_movies,
+)
+from api.renderers import NdjsonRenderer
 from api.serializers import (
+    AuthorListSerializer,
+    BulkEvaluationsSerializer,
+    MovieListSerializer,
     RegisterSpectatorSerializer,
 )
+from api.viewsets import get_spectator_from_request
+from cinema.models import Author, Movie
+from cinema.search import search
 
 
 class RegisterSpectatorView(CreateAPIView):
     permission_classes = [AllowAny]
     serializer_class = RegisterSpectatorSerializer
+
+
+class BulkEvaluationView(GenericAPIView):
+    """
+    Creates or updates many movies & authors evaluations at once, e.g.:
+
+        {
+            "movies": [{"movie": 8, "score": 80, "comment": "Great"}],
+            "authors": [{"author": 70, "score": 60}]
+        }
+
+    Responds with the `created` / `updated` status of each evaluation.
+    """
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = BulkEvaluationsSerializer
+
+    def post(self, request, *args, **kwargs):
+        spectator = get_spectator_from_request(request)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.save(spectator=spectator))
+
+
+class SearchView(GenericAPIView):
+    """
+    Full-text search over movies & authors, best matches first. Results use
+    the movies & authors list representations, plus their `type`.
+
+    Query parameters:
+    - `q`: searched text (required)
+    - `type`: only search `movie` or `author`
+    """
+
+    permission_classes = [AllowAny]
+
+    # type => (model, projection, serializer)
+    result_types = {
+        "movie": (Movie, MOVIE_LIST_FIELDS, MovieListSerializer),
+        "author": (Author, AUTHOR_LIST_FIELDS, AuthorListSerializer),
+    }
+
+    def get_queryset(self):
+        text = self.request.query_params.get("q", "").strip()
+        if not text:
+            raise ValidationError({"q": "This query parameter is required."})
+
+        kinds = tuple(self.result_types)
+        kind = self.request.query_params.get("type")
+        if kind:
+            if kind not in self.result_types:
+                raise ValidationError(
+                    {"type": f"Invalid value: {kind}. Allowed: {list(kinds)}"}
+                )
+            kinds = (kind,)
+
+        return search(text, kinds)
+
+    def get(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        return self.get_paginated_response(self.serialize(page))
+
+    def serialize(self, rows):
+        """
+        Loads the page objects with one query per type, and serializes them
+        in `rows` order.
+        """
+        context = self.get_serializer_context()
+
+        representations = {}
+        for kind, (
+            model,
+            fields,
+            serializer_class,
+        ) in self.result_types.items():
+            ids = [row["id"] for row in rows if row["type"] == kind]
+            if not ids:
+                continue
+
+            objects = model.objects.only(*fields).filter(pk__in=ids)
+            serializer = serializer_class(objects, many=True, context=context)
+            for data in serializer.data:
+                representations[kind, data["id"]] = {"type": kind, **data}
+
+        return [
+            representations[row["type"], row["id"]]
+            for row in rows
+            if (row["type"], row["id"]) in representations
+        ]
+
+
+class ExportView(APIView):
+    """
+    Streams every row of `get_queryset()` as newline delimited JSON.
+
+    Rows are read through a server-side cursor, `chunk_size` at a time, and
+    encoded one by one as the response is sent: memory use doesn't depend
+    on the table size.
+    Under ASGI rows are read with `aiterator()`, otherwise Django would
+    consume the whole iterator before sending the response.
+    """
+
+    permission_classes = [IsAuthenticated]
+    # Errors are still rendered as any other API response
+    renderer_classes = [NdjsonRenderer, *APIView.renderer_classes]
+    chunk_size = 2000
+    filename = None
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        renderer = NdjsonRenderer()
+        queryset = self.get_queryset()
+
+        if isinstance(request._request, ASGIRequest):
+            # Under ASGI a sync iterator would be consumed all at once before
+            # the response is sent
+            async def lines():
+                rows = queryset.aiterator(chunk_size=self.chunk_size)
+                async for row in rows:
+                    yield renderer.render(row)
+
+            content = lines()
+        else:
+            rows = queryset.iterator(chunk_size=self.chunk_size)
+            content = (renderer.render(row) for row in rows)
+
+        response = StreamingHttpResponse(
+            content, content_type="application/x-ndjson"
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{self.filename}"'
+        )
+        return response
+
+
+class MovieExportView(ExportView):
+    filename = "movies.ndjson"
+
+    def get_queryset(self):
+        return export_movies()
+
+
+class AuthorExportView(ExportView):
+    filename = "authors.ndjson"
+
+    def get_queryset(self):
+        return export_authors()
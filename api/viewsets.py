@@ -1,24 +1,60 @@
+from datetime import date
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.core.exceptions import PermissionDenied
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
-from api.filters import CreationSourceFilterMixin
+from api.cache import CachedListMixin, ConditionalGetMixin
+from api.filters import (
+    AuthorFilterSet,
+    CreationSourceFilterMixin,
+    MovieFilterSet,
+)
+from api.pagination import PageNumberOrKeysetPagination
+from api.querysets import (
+    AUTHOR_DETAILS_FIELDS,
+    AUTHOR_FIELD_COLUMNS,
+    AUTHOR_LIST_FIELDS,
+    MOVIE_DETAILS_FIELDS,
+    MOVIE_FIELD_COLUMNS,
+    MOVIE_LIST_FIELDS,
+    VALIDATOR_FIELDS,
+    prefetch_author_movies,
+    prefetch_movie_authors,
+)
 from api.serializers import (
     AuthorDetailsSerializer,
     AuthorListSerializer,
+    AuthorListValuesSerializer,
+    AuthorRankingSerializer,
+    BulkFavoriteAuthorsSerializer,
+    BulkFavoriteMoviesSerializer,
     CreateFavoriteAuthorSerializer,
     CreateFavoriteMovieSerializer,
     MovieDetailsSerializer,
     MovieListSerializer,
+    MovieListValuesSerializer,
+    MovieRankingSerializer,
     SpectatorAuthorEvaluationSerializer,
     SpectatorMovieEvaluationSerializer,
 )
 from cinema.models import (
     Author,
+    AuthorRanking,
     Movie,
+    MovieRanking,
+    Ranking,
     Spectator,
     SpectatorAuthorEvaluation,
     SpectatorMovieEvaluation,
@@ -26,13 +62,361 @@ from cinema.models import (
 
 
 def get_spectator_from_request(request):
+    if isinstance(request.user, Spectator):
+        # Already resolved by `ConcreteUserJWTAuthentication`
+        return request.user
+
     try:
         return request.user.spectator
     except Spectator.DoesNotExist:
         raise PermissionDenied("You must be a spectator to perform this query")
 
 
+class FastListMixin:
+    """
+    When `API_FAST_LIST_SERIALIZERS` is enabled, serves list actions from
+    `.values()` rows with `fast_list_serializer_class` (a `ValuesSerializer`)
+    instead of model instances and a `ModelSerializer`. Responses are the
+    same either way.
+    """
+
+    fast_list_serializer_class = None
+
+    def get_list_response(self, queryset):
+        serializer_class = self.fast_list_serializer_class
+        if not settings.API_FAST_LIST_SERIALIZERS or serializer_class is None:
+            serializer_class = self.get_serializer_class()
+        else:
+            # Annotations are kept: the ordering can use them (`similar`,
+            # `recommended`) and so do the keyset pagination cursors
+            queryset = queryset.values(
+                *serializer_class.values_fields, *queryset.query.annotations
+            )
+
+        context = self.get_serializer_context()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = serializer_class(page, many=True, context=context)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = serializer_class(queryset, many=True, context=context)
+        return Response(serializer.data)
+
+    def list(self, request, *args, **kwargs):
+        return self.get_list_response(self.filter_queryset(self.get_queryset()))
+
+    async def alist(self, request, *args, **kwargs):
+        # Filter backends and paginators are sync: the page is fetched and
+        # serialized in a thread
+        return await sync_to_async(FastListMixin.list)(
+            self, request, *args, **kwargs
+        )
+
+
+class AsyncReadMixin:
+    """
+    Serves `async_actions` with coroutines (`alist`, `aretrieve`) using the
+    async cache & ORM APIs. Under ASGI (`config.asgi`) such a request holds
+    no worker thread while it waits on the cache or the database.
+    Authentication, permissions and throttling still run in a thread, so do
+    list pages themselves: filter backends and paginators are sync, `alist`
+    only spares the thread on cache hits and conditional requests.
+
+    Only routes serving one of `async_actions` get an async view, other
+    actions (`top`, `evaluate`...) keep the stock sync view. On those
+    routes, other methods (`POST` on the list, writes on the detail) run
+    the stock `dispatch` in a thread, as Django runs sync views under ASGI.
+    Under WSGI Django runs async views with `async_to_sync`: responses are
+    the same either way.
+    """
+
+    async_actions = ("list", "retrieve")
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if not cls.is_async_route(actions):
+            return view
+
+        # Django only awaits views that are coroutine functions; `view` only
+        # instantiates the viewset and returns `dispatch`'s coroutine.
+        @wraps(view)
+        async def async_view(request, *args, **kwargs):
+            return await view(request, *args, **kwargs)
+
+        return async_view
+
+    @classmethod
+    def is_async_route(cls, actions):
+        return any(action in cls.async_actions for action in actions.values())
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.is_async_route(self.action_map):
+            return super().dispatch(request, *args, **kwargs)
+        return self.adispatch(request, *args, **kwargs)
+
+    async def adispatch(self, request, *args, **kwargs):
+        """
+        `APIView.dispatch` with the action handler awaited.
+        """
+        action = self.action_map.get(request.method.lower())
+        if action not in self.async_actions:
+            return await sync_to_async(super().dispatch)(
+                request, *args, **kwargs
+            )
+
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            handler = getattr(self, f"a{action}")
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(
+            request, response, *args, **kwargs
+        )
+        return self.response
+
+    async def aget_object(self):
+        """
+        Async `get_object`, the queryset (prefetches included) is evaluated
+        with `aget`.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+
+        try:
+            obj = await queryset.aget(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (
+            queryset.model.DoesNotExist,
+            DjangoValidationError,
+            TypeError,
+            ValueError,
+        ):
+            raise Http404
+
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+
+class BatchRetrieveMixin:
+    """
+    Serves `list` requests given `?ids=` (comma separated, at most
+    `API_BATCH_MAX_IDS`) as a batch `retrieve`: the detail representations
+    of the found objects, in the requested order, and the ids not found:
+
+        {"results": [{"id": 8, ...}, {"id": 3, ...}], "missing": [5]}
+
+    Objects are loaded like a `retrieve` (same projection, prefetches,
+    `?fields=` / `?expand=` support and permissions), with one query plus
+    one per prefetched relation whatever the number of ids. Filters,
+    ordering, pagination and the list cache don't apply.
+    """
+
+    batch_query_param = "ids"
+
+    def get_batch_ids(self):
+        """
+        Returns the requested ids, without duplicates, in order.
+        """
+        param = self.request.query_params[self.batch_query_param]
+        values = [value.strip() for value in param.split(",") if value.strip()]
+
+        if not values or not all(value.isdigit() for value in values):
+            raise ValidationError(
+                {self.batch_query_param: "Expected comma separated ids"}
+            )
+
+        ids = list(dict.fromkeys(int(value) for value in values))
+        if len(ids) > settings.API_BATCH_MAX_IDS:
+            raise ValidationError(
+                {
+                    self.batch_query_param: (
+                        f"At most {settings.API_BATCH_MAX_IDS} ids per request"
+                    )
+                }
+            )
+        return ids
+
+    def batch_retrieve(self, request):
+        ids = self.get_batch_ids()
+
+        # From here on, the request is handled as a `retrieve`
+        self.action = "retrieve"
+        self.check_permissions(request)
+
+        found = {obj.pk: obj for obj in self.get_queryset().filter(pk__in=ids)}
+        serializer = self.get_serializer(
+            [found[pk] for pk in ids if pk in found], many=True
+        )
+        return Response(
+            {
+                "results": serializer.data,
+                "missing": [pk for pk in ids if pk not in found],
+            }
+        )
+
+    def list(self, request, *args, **kwargs):
+        if self.batch_query_param in request.query_params:
+            return self.batch_retrieve(request)
+        return super().list(request, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        if self.batch_query_param in request.query_params:
+            return await sync_to_async(self.batch_retrieve)(request)
+        return await super().alist(request, *args, **kwargs)
+
+
+class SparseFieldsetsMixin:
+    """
+    `retrieve` support for `?fields=` (comma separated fields to output) and
+    `?expand=` (nested relations to embed, all of `expandable_fields` by
+    default unless `?fields=` is given). Relations named in `?fields=` are
+    expanded too.
+
+    The object is loaded with only the columns the requested fields need
+    (see `field_columns`) and only the requested relations are prefetched.
+    """
+
+    # relation => callable returning its `Prefetch`
+    expandable_fields = {}
+    # serializer field => model columns, for fields not backed by a column
+    # of the same name
+    field_columns = {}
+
+    def get_sparse_fields(self):
+        """
+        Returns the set of requested serializer fields, `None` when all of
+        them are.
+        """
+        params = self.request.query_params
+        if "fields" not in params and "expand" not in params:
+            return None
+
+        def split(param):
+            return {name.strip() for name in param.split(",") if name.strip()}
+
+        available = self.get_serializer_class().Meta.fields
+        relations = set(self.expandable_fields)
+
+        if "fields" in params:
+            fields = split(params["fields"])
+        else:
+            fields = set(available) - relations
+
+        if "expand" in params:
+            expand = split(params["expand"])
+        else:
+            expand = fields & relations
+
+        errors = {}
+        if unknown := fields - set(available):
+            errors["fields"] = f"Unknown fields: {sorted(unknown)}"
+        if unknown := expand - relations:
+            errors["expand"] = (
+                f"Unknown relations: {sorted(unknown)}, "
+                f"expected some of: {sorted(relations)}"
+            )
+        if errors:
+            raise ValidationError(errors)
+
+        return fields | expand
+
+    def get_sparse_queryset(self, queryset, fields):
+        columns = set(VALIDATOR_FIELDS)
+        for field in fields - set(self.expandable_fields):
+            columns.update(self.field_columns.get(field, (field,)))
+
+        queryset = queryset.only(*columns)
+        for relation, prefetch in self.expandable_fields.items():
+            if relation in fields:
+                queryset = queryset.prefetch_related(prefetch())
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action == "retrieve":
+            kwargs.setdefault("fields", self.get_sparse_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_variant(self):
+        # Sparse representations get their own ETags, see
+        # `ConditionalGetMixin`
+        variant = super().get_variant()
+        if self.action == "retrieve":
+            fields = self.get_sparse_fields()
+            if fields is not None:
+                variant += f"-{','.join(sorted(fields))}"
+        return variant
+
+
+class LeaderboardMixin:
+    """
+    Adds a public `top` action serving the materialized leaderboards of
+    `ranking_model` (see `cinema.models.Ranking`), picked with `?by=` (top
+    rated by default) and `?year=` when the ranking model supports it.
+    """
+
+    ranking_model = None
+    ranking_serializer_class = None
+    ranking_fields = ()
+
+    def get_ranking_queryset(self, request):
+        board = request.query_params.get("by", Ranking.Board.RATING)
+        if board not in Ranking.Board.values:
+            raise ValidationError(
+                {"by": f"Must be one of: {', '.join(Ranking.Board.values)}"}
+            )
+
+        year = request.query_params.get("year")
+        if year is not None:
+            if not self.ranking_model.year_field:
+                raise ValidationError(
+                    {"year": "No per year leaderboards for this resource"}
+                )
+            if not year.isdigit():
+                raise ValidationError({"year": f"Invalid year: {year}"})
+            year = int(year)
+
+        target_field = self.ranking_model.target_field
+        return (
+            self.ranking_model.objects.filter(board=board, year=year)
+            .select_related(target_field)
+            .only(
+                "rank",
+                "score",
+                *(f"{target_field}__{f}" for f in self.ranking_fields),
+            )
+            .order_by("rank")
+        )
+
+    @action(detail=False)
+    def top(self, request):
+        queryset = self.get_ranking_queryset(request)
+        context = self.get_serializer_context()
+
+        page = self.paginate_queryset(queryset)
+        serializer = self.ranking_serializer_class(
+            page, many=True, context=context
+        )
+        return self.get_paginated_response(serializer.data)
+
+
 class MovieViewSet(
+    AsyncReadMixin,
+    BatchRetrieveMixin,
+    SparseFieldsetsMixin,
+    LeaderboardMixin,
+    ConditionalGetMixin,
+    CachedListMixin,
+    FastListMixin,
     CreationSourceFilterMixin,
     mixins.ListModelMixin,
     mixins.UpdateModelMixin,
@@ -41,16 +425,41 @@ class MovieViewSet(
 ):
     ordering = ["title", "-release_date"]
     queryset = Movie.objects.all()
+    filterset_class = MovieFilterSet
+    pagination_class = PageNumberOrKeysetPagination
+    cache_models = (Movie,)
+    fast_list_serializer_class = MovieListValuesSerializer
+    ranking_model = MovieRanking
+    ranking_serializer_class = MovieRankingSerializer
+    ranking_fields = MOVIE_LIST_FIELDS
+    expandable_fields = {"authors": prefetch_movie_authors}
+    field_columns = MOVIE_FIELD_COLUMNS
 
     def get_queryset(self):
         qs = super().get_queryset()
+
+        if self.action in ("list", "by_year", "similar"):
+            qs = qs.only(*MOVIE_LIST_FIELDS)
+        elif self.action == "retrieve":
+            fields = self.get_sparse_fields()
+            if fields is None:
+                qs = qs.only(*MOVIE_DETAILS_FIELDS).prefetch_related(
+                    prefetch_movie_authors()
+                )
+            else:
+                qs = self.get_sparse_queryset(qs, fields)
+        elif self.action in ("update", "partial_update"):
+            # No projection here: saving a deferred instance would restrict
+            # the UPDATE to the loaded columns.
+            qs = qs.prefetch_related(prefetch_movie_authors())
+
         if self.action != "list":
             return qs
 
         return self.filter_by_created_source(qs)
 
     def get_serializer_class(self):
-        if self.action == "list" or self.action == "by_year":
+        if self.action in ("list", "by_year", "similar"):
             return MovieListSerializer
 
         return MovieDetailsSerializer
@@ -58,16 +467,46 @@ class MovieViewSet(
     def get_permissions(self):
         permissions = [IsAuthenticated]
 
-        if self.action == "list":
+        if self.action in ("list", "top"):
             permissions = [AllowAny]
 
         return [permission() for permission in permissions]
 
-    @action(detail=False, url_path=r"by-year/(?P<year>\d{4})")
-    def by_year(self, request, year):
-        qs = self.get_queryset().filter(release_date__year=year)
-        serializer = self.get_serializer(qs, many=True)
-        return Response(serializer.data)
+    @action(
+        detail=False,
+        url_path=r"by-year/(?P<year>\d{4})(?:-(?P<end_year>\d{4}))?",
+    )
+    def by_year(self, request, year, end_year=None):
+        year = int(year)
+        end_year = int(end_year) if end_year else year
+
+        if end_year < year or year < 1:
+            raise ValidationError(
+                {"year": f"Invalid year range: {year}-{end_year}"}
+            )
+
+        # Half-open date range instead of `release_date__year`: the latter
+        # compiles to `EXTRACT(year ...)` which can't use the index on
+        # `release_date`.
+        qs = self.filter_queryset(self.get_queryset()).filter(
+            release_date__gte=date(year, 1, 1),
+        )
+        if end_year < date.max.year:
+            qs = qs.filter(release_date__lt=date(end_year + 1, 1, 1))
+
+        return self.get_list_response(qs)
+
+    @action(detail=True)
+    def similar(self, request, pk):
+        # Precomputed, see `cinema.recommendations`
+        movie = self.get_object()
+        qs = (
+            self.get_queryset()
+            .filter(similar_to__movie=movie)
+            .annotate(similarity_rank=F("similar_to__rank"))
+            .order_by("similarity_rank")
+        )
+        return self.get_list_response(qs)
 
     @action(detail=True, methods=["post"])
     def evaluate(self, request, pk):
@@ -93,6 +532,13 @@ class MovieViewSet(
 
 
 class AuthorViewSet(
+    AsyncReadMixin,
+    BatchRetrieveMixin,
+    SparseFieldsetsMixin,
+    LeaderboardMixin,
+    ConditionalGetMixin,
+    CachedListMixin,
+    FastListMixin,
     CreationSourceFilterMixin,
     mixins.ListModelMixin,
     mixins.UpdateModelMixin,
@@ -101,10 +547,32 @@ class AuthorViewSet(
 ):
     queryset = Author.objects.all()
     ordering = ["last_name", "first_name"]
+    filterset_class = AuthorFilterSet
+    pagination_class = PageNumberOrKeysetPagination
+    cache_models = (Author,)
+    fast_list_serializer_class = AuthorListValuesSerializer
+    ranking_model = AuthorRanking
+    ranking_serializer_class = AuthorRankingSerializer
+    ranking_fields = AUTHOR_LIST_FIELDS
+    expandable_fields = {"movies": prefetch_author_movies}
+    field_columns = AUTHOR_FIELD_COLUMNS
 
     def get_queryset(self):
         qs = super().get_queryset()
 
+        if self.action == "list":
+            qs = qs.only(*AUTHOR_LIST_FIELDS)
+        elif self.action == "retrieve":
+            fields = self.get_sparse_fields()
+            if fields is None:
+                qs = qs.only(*AUTHOR_DETAILS_FIELDS).prefetch_related(
+                    prefetch_author_movies()
+                )
+            else:
+                qs = self.get_sparse_queryset(qs, fields)
+        elif self.action in ("update", "partial_update"):
+            qs = qs.prefetch_related(prefetch_author_movies())
+
         if self.action != "list":
             return qs
 
@@ -119,7 +587,7 @@ class AuthorViewSet(
     def get_permissions(self):
         permissions = []
 
-        if self.action == "list":
+        if self.action in ("list", "top"):
             permissions = [AllowAny]
         else:
             permissions = [IsAuthenticated]
@@ -161,19 +629,58 @@ class AuthorViewSet(
 
 
 # Favorites viewsets
+class BulkFavoritesMixin:
+    """
+    Adds a `bulk` action adding/removing many favorites at once, or replacing
+    them all (see `BulkFavoritesSerializer`). The related manager computes
+    the diff with the current favorites and applies it with one INSERT
+    and/or one DELETE on the M2M table.
+    """
+
+    favorites_field = None
+    bulk_serializer_class = None
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        serializer = self.bulk_serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        favorites = getattr(
+            get_spectator_from_request(request), self.favorites_field
+        )
+        with transaction.atomic():
+            if "set" in data:
+                favorites.set(data["set"])
+            else:
+                if data.get("remove"):
+                    favorites.remove(*data["remove"])
+                if data.get("add"):
+                    favorites.add(*data["add"])
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 class FavoriteMoviesViewSet(
+    BulkFavoritesMixin,
+    FastListMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
     viewsets.GenericViewSet,
 ):
     permission_classes = [IsAuthenticated]
+    pagination_class = PageNumberOrKeysetPagination
+    fast_list_serializer_class = MovieListValuesSerializer
+    favorites_field = "favorite_movies"
+    bulk_serializer_class = BulkFavoriteMoviesSerializer
     lookup_url_kwarg = "pk"
     lookup_field = "pk"
     ordering = ["title", "-release_date"]
 
     def get_queryset(self):
-        return get_spectator_from_request(self.request).favorite_movies.all()
+        spectator = get_spectator_from_request(self.request)
+        return spectator.favorite_movies.only(*MOVIE_LIST_FIELDS)
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -181,6 +688,26 @@ class FavoriteMoviesViewSet(
 
         return MovieListSerializer
 
+    @action(detail=False)
+    def recommended(self, request):
+        """
+        Movies most similar to the spectator favorite & evaluated movies,
+        ranked by their summed similarities.
+        """
+        spectator = get_spectator_from_request(request)
+        seen = Movie.objects.filter(
+            Q(favorited_by=spectator) | Q(evaluations__spectator=spectator)
+        ).values("pk")
+
+        qs = (
+            Movie.objects.filter(similar_to__movie__in=seen)
+            .exclude(pk__in=seen)
+            .only(*MOVIE_LIST_FIELDS)
+            .annotate(relevance=Sum("similar_to__score"))
+            .order_by("-relevance", "pk")
+        )
+        return self.get_list_response(qs)
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -197,18 +724,25 @@ class FavoriteMoviesViewSet(
 
 
 class FavoriteAuthorsViewSet(
+    BulkFavoritesMixin,
+    FastListMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
     viewsets.GenericViewSet,
 ):
     permission_classes = [IsAuthenticated]
+    pagination_class = PageNumberOrKeysetPagination
+    fast_list_serializer_class = AuthorListValuesSerializer
+    favorites_field = "favorite_authors"
+    bulk_serializer_class = BulkFavoriteAuthorsSerializer
     ordering = ["last_name", "first_name"]
     lookup_url_kwarg = "pk"
     lookup_field = "pk"
 
     def get_queryset(self):
-        return get_spectator_from_request(self.request).favorite_authors.all()
+        spectator = get_spectator_from_request(self.request)
+        return spectator.favorite_authors.only(*AUTHOR_LIST_FIELDS)
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -0,0 +1,30 @@
+"""
+Micro benchmarks, run them with `just bench <name>`, e.g `just bench serializers`.
+"""
+
+import os
+import time
+
+import django
+
+
+def setup():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    django.setup()
+
+    from django.conf import settings
+
+    # Host used by `APIRequestFactory` / `APIClient` requests
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+
+
+def measure(func, repeat=5):
+    """
+    Returns the best wall time of `repeat` runs of `func`, in seconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
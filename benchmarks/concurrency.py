@@ -0,0 +1,188 @@
+"""
+Load test of the public list endpoints served by gunicorn threaded workers
+(`config.wsgi`) against uvicorn workers (`config.asgi`), both with the same
+number of worker processes so that they run at about the same memory (the
+servers total RSS is reported next to each result).
+
+Each virtual client sends its request line, waits `--client-delay` seconds
+before the end of its headers (a slow client) and reads the whole response.
+Throttling is disabled in the servers workers (see `post_worker_init`).
+
+    just bench concurrency --concurrency 10 100 500
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import socket
+import statistics
+import subprocess
+import time
+from pathlib import Path
+
+SERVERS = {
+    "wsgi": ["config.wsgi:application", "--threads", "{threads}"],
+    "asgi": [
+        "config.asgi:application",
+        "--worker-class",
+        "uvicorn_worker.UvicornWorker",
+    ],
+}
+
+
+def post_worker_init(worker):
+    # Gunicorn hook, this module is the servers config file
+    from rest_framework.settings import api_settings
+
+    # Shared by every view `throttle_classes`
+    api_settings.DEFAULT_THROTTLE_CLASSES.clear()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(name, port, workers, threads, env=None):
+    command = [
+        "gunicorn",
+        *(arg.format(threads=threads) for arg in SERVERS[name]),
+        "--config",
+        f"python:{__spec__.name}",
+        "--bind",
+        f"127.0.0.1:{port}",
+        "--workers",
+        str(workers),
+        "--timeout",
+        "60",
+        "--log-level",
+        "warning",
+    ]
+    server = subprocess.Popen(command, env={**os.environ, **(env or {})})
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.2)
+
+    server.terminate()
+    raise RuntimeError(f"{name} server didn't start")
+
+
+def rss(pid):
+    """
+    Resident memory of `pid` and its children, in MB (Linux only).
+    """
+    pids, total = [pid], 0
+    while pids:
+        pid = pids.pop()
+        status = Path(f"/proc/{pid}/status").read_text()
+        total += next(
+            int(line.split()[1])
+            for line in status.splitlines()
+            if line.startswith("VmRSS:")
+        )
+        children = Path(f"/proc/{pid}/task/{pid}/children").read_text()
+        pids.extend(int(child) for child in children.split())
+    return total / 1024
+
+
+async def fetch(port, path, delay):
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        writer.write(f"GET {path} HTTP/1.1\r\n".encode())
+        await writer.drain()
+        await asyncio.sleep(delay)
+        writer.write(b"Host: 127.0.0.1\r\nConnection: close\r\n\r\n")
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    return int(response[9:12]), time.perf_counter() - start
+
+
+async def load(port, paths, concurrency, requests, delay):
+    """
+    Sends `requests` requests over `concurrency` concurrent clients, returns
+    the latencies of successful ones, the number of errors and the elapsed
+    time.
+    """
+    urls = itertools.cycle(paths)
+    remaining = iter(range(requests))
+    latencies, errors = [], 0
+
+    async def client():
+        nonlocal errors
+        for _ in remaining:
+            try:
+                status, latency = await fetch(port, next(urls), delay)
+            except OSError:
+                status = None
+            if status == 200:
+                latencies.append(latency)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--servers", nargs="+", default=list(SERVERS))
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[10, 50, 200]
+    )
+    parser.add_argument("--requests", type=int, default=1_000)
+    parser.add_argument("--client-delay", type=float, default=0.05)
+    parser.add_argument(
+        "--paths", nargs="+", default=["/api/movies/", "/api/authors/"]
+    )
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+    for name in args.servers:
+        port = free_port()
+        server = start_server(name, port, args.workers, args.threads)
+        try:
+            # Warm up: imports, connections and list caches
+            asyncio.run(load(port, args.paths, 1, 10, 0))
+
+            for concurrency in args.concurrency:
+                latencies, errors, elapsed = asyncio.run(
+                    load(
+                        port,
+                        args.paths,
+                        concurrency,
+                        args.requests,
+                        args.client_delay,
+                    )
+                )
+                if len(latencies) > 1:
+                    quantiles = statistics.quantiles(latencies, n=100)
+                    p50, p99 = quantiles[49], quantiles[98]
+                else:
+                    p50 = p99 = float("nan")
+                print(
+                    f"{name} | {concurrency:>4} clients: "
+                    f"{len(latencies) / elapsed:8.1f} req/s, "
+                    f"p50 {p50 * 1e3:7.1f} ms, p99 {p99 * 1e3:7.1f} ms, "
+                    f"{errors} errors, {rss(server.pid):6.1f} MB RSS"
+                )
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Compares the per row cost of `HyperlinkedIdentityField` (one `reverse()` per
+row) against `TemplatedHyperlinkedIdentityField` (URL template resolved once
+per request) on large pages.
+"""
+
+import argparse
+
+from benchmarks import measure, setup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[50, 1_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup()
+
+    from rest_framework import serializers
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from api.fields import TemplatedHyperlinkedIdentityField
+    from cinema.models import Movie
+
+    class ReverseSerializer(serializers.Serializer):
+        details = serializers.HyperlinkedIdentityField(view_name="movie-detail")
+
+    class TemplatedSerializer(serializers.Serializer):
+        details = TemplatedHyperlinkedIdentityField(view_name="movie-detail")
+
+    for rows in args.rows:
+        movies = [Movie(pk=pk) for pk in range(1, rows + 1)]
+
+        def run(serializer_class):
+            # New request each run, as templates are resolved per request
+            request = Request(APIRequestFactory().get("/api/movies/"))
+            context = {"request": request}
+            return serializer_class(movies, many=True, context=context).data
+
+        assert run(ReverseSerializer) == run(TemplatedSerializer)
+
+        reverse_time = measure(lambda: run(ReverseSerializer), args.repeat)
+        templated_time = measure(lambda: run(TemplatedSerializer), args.repeat)
+
+        print(
+            f"{rows:>6} rows | reverse(): {reverse_time / rows * 1e6:6.2f} µs/row"
+            f" | template: {templated_time / rows * 1e6:6.2f} µs/row"
+            f" | saved {(reverse_time - templated_time) / rows * 1e6:6.2f} µs/row"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Compares `/api/movies/` latency under concurrent load with the database
+connection modes of `config.settings`: a new connection per request, the
+persistent per thread connections (`DATABASE_CONN_MAX_AGE`) and psycopg's
+pool (`DATABASE_POOL_MAX_SIZE`, sized to the threads of each worker). The
+list cache is disabled so that every request hits the database.
+
+Also reports the number of server connections opened on the database.
+
+    just bench pooling --concurrency 10 50 200
+"""
+
+import argparse
+import asyncio
+import statistics
+
+from benchmarks import setup
+from benchmarks.concurrency import free_port, load, start_server
+
+
+def modes(threads):
+    return {
+        "no persistence": {"DATABASE_CONN_MAX_AGE": "0"},
+        "persistent": {"DATABASE_CONN_MAX_AGE": "60"},
+        "pool": {
+            "DATABASE_POOL_MIN_SIZE": str(threads),
+            "DATABASE_POOL_MAX_SIZE": str(threads),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--server", choices=["wsgi", "asgi"], default="wsgi")
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[10, 50, 200]
+    )
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--path", default="/api/movies/")
+    args = parser.parse_args()
+
+    setup()
+
+    from django.db import connection
+
+    def server_connections():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM pg_stat_activity "
+                "WHERE datname = current_database() AND pid <> pg_backend_pid()"
+            )
+            return cursor.fetchone()[0]
+
+    for name, env in modes(args.threads).items():
+        port = free_port()
+        server = start_server(
+            args.server,
+            port,
+            args.workers,
+            args.threads,
+            env={**env, "API_LIST_CACHE_TIMEOUT": "0"},
+        )
+        try:
+            asyncio.run(load(port, [args.path], 1, 10, 0))
+
+            for concurrency in args.concurrency:
+                latencies, errors, elapsed = asyncio.run(
+                    load(port, [args.path], concurrency, args.requests, 0)
+                )
+                quantiles = statistics.quantiles(latencies, n=100)
+                print(
+                    f"{name:<14} | {concurrency:>4} clients: "
+                    f"p50 {quantiles[49] * 1e3:7.1f} ms, "
+                    f"p99 {quantiles[98] * 1e3:7.1f} ms, "
+                    f"{len(latencies) / elapsed:8.1f} req/s, "
+                    f"{errors} errors, "
+                    f"{server_connections()} connections"
+                )
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Compares rendering times of DRF's `JSONRenderer` against `OrjsonRenderer` and
+`MessagePackRenderer` on movie details shaped pages (the embedded authors
+included), without any serializer or database cost.
+"""
+
+import argparse
+
+from benchmarks import measure, setup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[50, 1_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup()
+
+    from rest_framework.renderers import JSONRenderer
+
+    from api.renderers import MessagePackRenderer, OrjsonRenderer
+
+    renderers = {
+        "json": JSONRenderer(),
+        "orjson": OrjsonRenderer(),
+        "msgpack": MessagePackRenderer(),
+    }
+
+    for rows in args.rows:
+        page = {
+            "count": rows,
+            "next": None,
+            "previous": None,
+            "results": [
+                {
+                    "id": pk,
+                    "title": f"Movie n°{pk}",
+                    "description": "A short film by Peter Greenaway. " * 5,
+                    "release_date": "1976-07-26",
+                    "status": "Released",
+                    "evaluation": 0,
+                    "imdb_page": f"https://www.imdb.com/title/tt{pk:07}/",
+                    "evaluations_count": 12,
+                    "score_avg": 65.5,
+                    "score_sum": 786,
+                    "authors": [
+                        {
+                            "id": pk * 10 + index,
+                            "full_name": "Peter Greenaway",
+                            "details": f"http://localhost/api/authors/{pk}/",
+                        }
+                        for index in range(3)
+                    ],
+                }
+                for pk in range(1, rows + 1)
+            ],
+        }
+        assert renderers["json"].render(page) == renderers["orjson"].render(
+            page
+        )
+
+        timings = {
+            name: measure(lambda: renderer.render(page), args.repeat)
+            for name, renderer in renderers.items()
+        }
+        sizes = {
+            name: len(renderer.render(page))
+            for name, renderer in renderers.items()
+        }
+        print(
+            f"{rows:>6} rows | "
+            + " | ".join(
+                f"{name}: {timings[name] / rows * 1e6:6.2f} µs/row "
+                f"({sizes[name] / rows:.0f} B/row, "
+                f"x{timings['json'] / timings[name]:.1f})"
+                for name in renderers
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
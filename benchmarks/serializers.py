@@ -0,0 +1,107 @@
+"""
+Compares rows per second of the `ModelSerializer` list serializers against
+their `.values()` based counterparts.
+
+No database is involved: rows are built in memory, model instances with
+`Model.from_db()` as the ORM would, so that only instantiation and
+serialization costs are measured.
+"""
+
+import argparse
+from datetime import date, timedelta
+
+from benchmarks import measure, setup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup()
+
+    from rest_framework.test import APIRequestFactory
+
+    from api.querysets import AUTHOR_LIST_FIELDS, MOVIE_LIST_FIELDS
+    from api.serializers import (
+        AuthorListSerializer,
+        AuthorListValuesSerializer,
+        MovieListSerializer,
+        MovieListValuesSerializer,
+    )
+    from cinema.models import Author, Movie
+
+    request = APIRequestFactory().get("/api/movies/")
+    context = {"request": request}
+
+    movie_rows = [
+        {
+            "id": pk,
+            "title": f"Movie {pk}",
+            "release_date": date(1970, 1, 1) + timedelta(days=pk),
+        }
+        for pk in range(1, args.rows + 1)
+    ]
+    author_rows = [
+        {"id": pk, "first_name": f"First {pk}", "last_name": f"Last {pk}"}
+        for pk in range(1, args.rows + 1)
+    ]
+
+    cases = [
+        (
+            "movies",
+            Movie,
+            MOVIE_LIST_FIELDS,
+            movie_rows,
+            MovieListSerializer,
+            MovieListValuesSerializer,
+        ),
+        (
+            "authors",
+            Author,
+            AUTHOR_LIST_FIELDS,
+            author_rows,
+            AuthorListSerializer,
+            AuthorListValuesSerializer,
+        ),
+    ]
+
+    for name, model, fields, rows, model_serializer, values_serializer in cases:
+        # `from_db()` expects values in concrete fields order. With
+        # multi-table inheritance `Author` rows also load `user_ptr_id`.
+        pk_attname = model._meta.pk.attname
+        attnames = [
+            field.attname
+            for field in model._meta.concrete_fields
+            if field.attname in fields or field.attname == pk_attname
+        ]
+
+        def model_path():
+            instances = [
+                model.from_db(
+                    "default",
+                    attnames,
+                    [row[f if f != pk_attname else "id"] for f in attnames],
+                )
+                for row in rows
+            ]
+            return model_serializer(instances, many=True, context=context).data
+
+        def values_path():
+            return values_serializer(rows, many=True, context=context).data
+
+        assert model_path() == values_path()
+
+        model_time = measure(model_path, args.repeat)
+        values_time = measure(values_path, args.repeat)
+
+        print(
+            f"{name:<8} ModelSerializer: {len(rows) / model_time:>10,.0f} rows/s"
+            f" | values(): {len(rows) / values_time:>10,.0f} rows/s"
+            f" | x{model_time / values_time:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Compares the per request overhead of DRF's history based `AnonRateThrottle`
+against the sliding window throttle with each counters backend, for clients
+at different request rates (DRF's history list grows with the rate).
+"""
+
+import argparse
+import tempfile
+from pathlib import Path
+
+from benchmarks import measure, setup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--history", type=int, nargs="+", default=[10, 1_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup()
+
+    from django.conf import settings
+    from django.core.cache import cache
+    from rest_framework import throttling
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from api import throttling as sliding
+
+    request = Request(APIRequestFactory().get("/api/movies/"))
+    settings.API_THROTTLE_SQLITE_PATH = str(
+        Path(tempfile.mkdtemp()) / "throttle.sqlite3"
+    )
+
+    candidates = {
+        "drf history (cache)": (throttling.AnonRateThrottle, None),
+        "sliding (cache)": (
+            sliding.AnonRateThrottle,
+            "api.throttling.CacheThrottleBackend",
+        ),
+        "sliding (sqlite)": (
+            sliding.AnonRateThrottle,
+            "api.throttling.SQLiteThrottleBackend",
+        ),
+    }
+
+    for history in args.history:
+        for name, (base, backend) in candidates.items():
+            if backend:
+                settings.API_THROTTLE_BACKEND = backend
+
+            class Throttle(base):
+                # Never denied, `history` requests already in the window
+                rate = f"{history + args.requests * (args.repeat + 1)}/day"
+
+            # Also resets `CacheThrottleBackend` counters
+            cache.clear()
+            if backend == "api.throttling.SQLiteThrottleBackend":
+                sliding.get_throttle_backend().clear()
+            for _ in range(history):
+                Throttle().allow_request(request, None)
+
+            def run():
+                for _ in range(args.requests):
+                    assert Throttle().allow_request(request, None)
+
+            elapsed = measure(run, args.repeat)
+            print(
+                f"{history:>6} in window | {name:<20}: "
+                f"{elapsed / args.requests * 1e6:8.2f} µs/request"
+            )
+
+
+if __name__ == "__main__":
+    main()
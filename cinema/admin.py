@@ -1,8 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.models import Group
 from django.contrib.sites.models import Site
-from django.db.models import CharField, Value
-from django.db.models.functions import Coalesce, Concat, Lower
 from django.utils.html import format_html
 
 from cinema.models import (
@@ -11,6 +9,7 @@ from cinema.models import (
     Spectator,
     SpectatorAuthorEvaluation,
     SpectatorMovieEvaluation,
+    full_name_sort,
 )
 
 # Unregister default models
@@ -27,14 +26,8 @@ class FullNameColumnMixin:
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.annotate(
-            full_name_sort=Concat(
-                Lower(Coalesce("last_name", Value(""))),
-                Value(" "),
-                Lower(Coalesce("first_name", Value(""))),
-                output_field=CharField(),
-            )
-        )
+        # Indexed, see `user_full_name_sort_idx`
+        return qs.annotate(full_name_sort=full_name_sort())
 
     @admin.display(description="Full name", ordering="full_name_sort")
     def full_name_admin(self, obj):
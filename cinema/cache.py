@@ -0,0 +1,139 @@
+import time
+
+from django.core.cache import cache
+
+GENERATION_KEY = "cinema:generation:{label}"
+MODIFIED_KEY = "cinema:modified:{label}"
+STATS_KEY = "cinema:cache:{name}:{outcome}"
+
+
+def _generation_key(model) -> str:
+    return GENERATION_KEY.format(label=model._meta.label_lower)
+
+
+def _modified_key(model) -> str:
+    return MODIFIED_KEY.format(label=model._meta.label_lower)
+
+
+def _seed() -> int:
+    # Counters are seeded with a timestamp rather than 1 so that a counter
+    # evicted from the cache never goes back to a generation still referenced
+    # by cached entries.
+    return time.time_ns()
+
+
+def get_generations(*models) -> tuple[int, ...]:
+    """
+    Returns the current generation of each model, in a single cache round
+    trip when they are all set.
+    """
+    keys = [_generation_key(model) for model in models]
+    generations = cache.get_many(keys)
+
+    for key in keys:
+        if key not in generations:
+            cache.add(key, _seed(), timeout=None)
+            generations[key] = cache.get(key)
+
+    return tuple(generations[key] for key in keys)
+
+
+async def aget_generations(*models) -> tuple[int, ...]:
+    """
+    Async `get_generations`.
+    """
+    keys = [_generation_key(model) for model in models]
+    generations = await cache.aget_many(keys)
+
+    for key in keys:
+        if key not in generations:
+            await cache.aadd(key, _seed(), timeout=None)
+            generations[key] = await cache.aget(key)
+
+    return tuple(generations[key] for key in keys)
+
+
+def bump_generations(*models):
+    """
+    Invalidates everything cached against the given models generation, without
+    having to look up or delete the cached keys themselves.
+    """
+    for model in models:
+        key = _generation_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Not set (or evicted), any fresh value is a new generation
+            cache.add(key, _seed(), timeout=None)
+
+    cache.set_many(
+        {_modified_key(model): int(time.time()) for model in models},
+        timeout=None,
+    )
+
+
+def get_last_modified(*models) -> int | None:
+    """
+    Returns the timestamp of the latest generation bump among the given
+    models, or `None` when unknown.
+    """
+    keys = [_modified_key(model) for model in models]
+    timestamps = cache.get_many(keys)
+    if len(timestamps) != len(keys):
+        return None
+
+    return max(timestamps.values())
+
+
+async def aget_last_modified(*models) -> int | None:
+    """
+    Async `get_last_modified`.
+    """
+    keys = [_modified_key(model) for model in models]
+    timestamps = await cache.aget_many(keys)
+    if len(timestamps) != len(keys):
+        return None
+
+    return max(timestamps.values())
+
+
+def _incr_counter(key: str):
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+async def _aincr_counter(key: str):
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        if not await cache.aadd(key, 1, timeout=None):
+            await cache.aincr(key)
+
+
+def record_hit(name: str):
+    _incr_counter(STATS_KEY.format(name=name, outcome="hits"))
+
+
+def record_miss(name: str):
+    _incr_counter(STATS_KEY.format(name=name, outcome="misses"))
+
+
+async def arecord_hit(name: str):
+    await _aincr_counter(STATS_KEY.format(name=name, outcome="hits"))
+
+
+async def arecord_miss(name: str):
+    await _aincr_counter(STATS_KEY.format(name=name, outcome="misses"))
+
+
+def get_stats(name: str) -> dict[str, int]:
+    hits_key = STATS_KEY.format(name=name, outcome="hits")
+    misses_key = STATS_KEY.format(name=name, outcome="misses")
+    values = cache.get_many([hits_key, misses_key])
+    return {
+        "hits": values.get(hits_key, 0),
+        "misses": values.get(misses_key, 0),
+    }
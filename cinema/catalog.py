@@ -0,0 +1,356 @@
+"""
+Bulk catalog dump & load with PostgreSQL `COPY`, see the `catalog_dump` and
+`catalog_load` commands.
+
+Only the TMDB catalog is moved: authors & movies having a `tmdb_id`, which is
+their natural key, and the links between them. Each table is dumped as the
+binary `COPY` output of a `SELECT`, gzipped, in `<table>.copy.gz`. Loading
+copies a file into a temporary staging table created from the same `SELECT`
+(so that column types match), then upserts from there on `tmdb_id`: loading
+twice, or into a database already holding part of the catalog, updates rows
+instead of duplicating them.
+
+Computed columns (evaluation aggregates, version stamps, search vectors) are
+never dumped: they're reset for new rows and recomputed after the load.
+"""
+
+import gzip
+import json
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+
+from cinema.cache import bump_generations
+from cinema.models import Author, Movie, User
+
+MANIFEST = "manifest.json"
+LOAD_STATE = "load_state.json"
+CHUNK_SIZE = 1 << 20
+
+_user = User._meta.db_table
+_author = Author._meta.db_table
+_movie = Movie._meta.db_table
+_movie_authors = Movie.authors.through._meta.db_table
+
+AUTHOR_COLUMNS = (
+    "imdb_id",
+    "birth_day",
+    "death_day",
+    "biography",
+    "tmdb_population_date",
+    "creation_source",
+)
+MOVIE_COLUMNS = (
+    "title",
+    "original_title",
+    "description",
+    "imdb_id",
+    "evaluation",
+    "status",
+    "budget",
+    "release_date",
+    "tmdb_population_date",
+    "creation_source",
+)
+
+
+def _list(columns, prefix):
+    return ", ".join(f"{prefix}.{column}" for column in columns)
+
+
+@dataclass
+class Table:
+    name: str
+    # Rows to dump, also the staging table definition
+    select: str
+    # Statements upserting the `staging` table rows
+    upserts: tuple
+
+    @property
+    def filename(self):
+        return f"{self.name}.copy.gz"
+
+
+TABLES = (
+    Table(
+        name="authors",
+        select=f"""
+            SELECT u.username, u.first_name, u.last_name, a.tmdb_id,
+                {_list(AUTHOR_COLUMNS, "a")}
+            FROM {_author} a JOIN {_user} u ON u.id = a.user_ptr_id
+            WHERE a.tmdb_id IS NOT NULL
+        """,
+        upserts=(
+            # Changed authors (before their names get updated) and the movies
+            # embedding them
+            f"""
+            WITH changed AS (
+                UPDATE {_author} a SET
+                    {", ".join(f"{c} = s.{c}" for c in AUTHOR_COLUMNS)},
+                    version = a.version + 1,
+                    updated_at = now()
+                FROM staging s, {_user} u
+                WHERE a.tmdb_id = s.tmdb_id AND u.id = a.user_ptr_id
+                AND (u.first_name, u.last_name, {_list(AUTHOR_COLUMNS, "a")})
+                    IS DISTINCT FROM
+                    (s.first_name, s.last_name, {_list(AUTHOR_COLUMNS, "s")})
+                RETURNING a.user_ptr_id
+            )
+            UPDATE {_movie} SET version = version + 1, updated_at = now()
+            WHERE id IN (
+                SELECT movie_id FROM {_movie_authors}
+                WHERE author_id IN (SELECT user_ptr_id FROM changed)
+            )
+            """,
+            f"""
+            UPDATE {_user} u SET first_name = s.first_name,
+                last_name = s.last_name
+            FROM staging s JOIN {_author} a ON a.tmdb_id = s.tmdb_id
+            WHERE u.id = a.user_ptr_id
+            AND (u.first_name, u.last_name)
+                IS DISTINCT FROM (s.first_name, s.last_name)
+            """,
+            # New authors: the parent user row first, with a unique username
+            f"""
+            WITH new AS (
+                SELECT s.*, CASE
+                    WHEN count(*) OVER (PARTITION BY s.username) > 1
+                    OR EXISTS (
+                        SELECT 1 FROM {_user} u WHERE u.username = s.username
+                    )
+                    THEN s.username || '_' || s.tmdb_id
+                    ELSE s.username
+                END AS new_username
+                FROM staging s
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM {_author} a WHERE a.tmdb_id = s.tmdb_id
+                )
+            ), users AS (
+                INSERT INTO {_user} (
+                    password, is_superuser, username, first_name, last_name,
+                    email, is_staff, is_active, date_joined
+                )
+                SELECT '!', false, new_username, first_name, last_name, '',
+                    false, true, now()
+                FROM new
+                RETURNING id, username
+            )
+            INSERT INTO {_author} (
+                user_ptr_id, tmdb_id, {", ".join(AUTHOR_COLUMNS)},
+                version, updated_at, evaluations_count, score_sum
+            )
+            SELECT users.id, new.tmdb_id, {_list(AUTHOR_COLUMNS, "new")},
+                0, now(), 0, 0
+            FROM new JOIN users ON users.username = new.new_username
+            """,
+        ),
+    ),
+    Table(
+        name="movies",
+        select=f"""
+            SELECT m.tmdb_id, {_list(MOVIE_COLUMNS, "m")}
+            FROM {_movie} m
+            WHERE m.tmdb_id IS NOT NULL
+        """,
+        upserts=(
+            # Changed movies also change the details of their authors
+            f"""
+            WITH changed AS (
+                INSERT INTO {_movie} (
+                    tmdb_id, {", ".join(MOVIE_COLUMNS)}, version, updated_at,
+                    evaluations_count, score_sum, similarities_stale
+                )
+                SELECT s.tmdb_id, {_list(MOVIE_COLUMNS, "s")}, 0, now(), 0, 0,
+                    true
+                FROM staging s
+                ON CONFLICT (tmdb_id) DO UPDATE SET
+                    {", ".join(f"{c} = EXCLUDED.{c}" for c in MOVIE_COLUMNS)},
+                    version = {_movie}.version + 1,
+                    updated_at = now()
+                WHERE ({_list(MOVIE_COLUMNS, _movie)})
+                    IS DISTINCT FROM ({_list(MOVIE_COLUMNS, "EXCLUDED")})
+                RETURNING id
+            )
+            UPDATE {_author} SET version = version + 1, updated_at = now()
+            WHERE user_ptr_id IN (
+                SELECT author_id FROM {_movie_authors}
+                WHERE movie_id IN (SELECT id FROM changed)
+            )
+            """,
+        ),
+    ),
+    Table(
+        name="movie_authors",
+        select=f"""
+            SELECT m.tmdb_id AS movie_tmdb_id, a.tmdb_id AS author_tmdb_id
+            FROM {_movie_authors} ma
+            JOIN {_movie} m ON m.id = ma.movie_id
+            JOIN {_author} a ON a.user_ptr_id = ma.author_id
+            WHERE m.tmdb_id IS NOT NULL AND a.tmdb_id IS NOT NULL
+        """,
+        upserts=(
+            # New links change both sides details: bump their version stamps
+            f"""
+            WITH links AS (
+                INSERT INTO {_movie_authors} (movie_id, author_id)
+                SELECT m.id, a.user_ptr_id
+                FROM staging s
+                JOIN {_movie} m ON m.tmdb_id = s.movie_tmdb_id
+                JOIN {_author} a ON a.tmdb_id = s.author_tmdb_id
+                ON CONFLICT DO NOTHING
+                RETURNING movie_id, author_id
+            ), movies AS (
+                UPDATE {_movie} SET version = version + 1, updated_at = now(),
+                    similarities_stale = true
+                WHERE id IN (SELECT movie_id FROM links)
+            )
+            UPDATE {_author} SET version = version + 1, updated_at = now()
+            WHERE user_ptr_id IN (SELECT author_id FROM links)
+            """,
+        ),
+    ),
+)
+
+
+class Throughput:
+    """
+    Times a phase and formats its throughput.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+
+    def report(self, rows, size):
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        return (
+            f"{rows:,} rows, {size / 1e6:.1f} MB in {elapsed:.1f}s "
+            f"({rows / elapsed:,.0f} rows/s, {size / 1e6 / elapsed:.1f} MB/s)"
+        )
+
+
+def _read_json(path, default):
+    return json.loads(path.read_text()) if path.exists() else default
+
+
+def _write_json(path, data):
+    path.write_text(json.dumps(data, indent=2))
+
+
+def dump_table(table, directory):
+    """
+    Writes `table` rows to its gzipped file (through a `.part` file, so that
+    an interrupted dump never leaves a truncated file behind) and returns
+    the number of rows.
+    """
+    path = directory / table.filename
+    part = path.with_suffix(".part")
+
+    with connection.cursor() as cursor:
+        with (
+            gzip.open(part, "wb", compresslevel=6) as file,
+            cursor.copy(
+                f"COPY ({table.select}) TO STDOUT (FORMAT binary)"
+            ) as copy,
+        ):
+            for data in copy:
+                file.write(data)
+        # Only known once COPY finished, and gone once the cursor is closed
+        rows = cursor.rowcount
+
+    part.rename(path)
+    return rows
+
+
+def dump(directory, tables=TABLES, force=False, log=print):
+    """
+    Dumps `tables` in `directory`, skipping the ones already dumped there
+    unless `force` is set.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    manifest = _read_json(directory / MANIFEST, {})
+
+    for table in tables:
+        if table.name in manifest and not force:
+            log(f"{table.name}: already dumped, skipped")
+            continue
+
+        timer = Throughput()
+        rows = dump_table(table, directory)
+        size = (directory / table.filename).stat().st_size
+        log(f"{table.name}: dumped {timer.report(rows, size)}")
+
+        manifest[table.name] = {"rows": rows, "file": table.filename}
+        _write_json(directory / MANIFEST, manifest)
+
+
+@transaction.atomic
+def load_table(table, directory):
+    """
+    Copies `table` file into a `staging` temporary table and upserts its
+    rows. Runs in a single transaction: an interrupted load leaves the table
+    untouched.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS staging")
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE staging ON COMMIT DROP AS "
+            f"{table.select} WITH NO DATA"
+        )
+
+        with (
+            gzip.open(directory / table.filename, "rb") as file,
+            cursor.copy("COPY staging FROM STDIN (FORMAT binary)") as copy,
+        ):
+            while data := file.read(CHUNK_SIZE):
+                copy.write(data)
+        rows = cursor.rowcount
+
+        for statement in table.upserts:
+            cursor.execute(statement)
+
+        if table.name == "authors":
+            Author.refresh_search_vectors(
+                Author.objects.filter(
+                    tmdb_id__in=RawSQL("SELECT tmdb_id FROM staging", ())
+                )
+            )
+
+        cursor.execute("DROP TABLE staging")
+
+    return rows
+
+
+def load(directory, tables=TABLES, restart=False, log=print):
+    """
+    Loads every dumped table of `directory`. Loaded tables are recorded per
+    database in a state file, so that an interrupted load resumes from the
+    first table not loaded yet (unless `restart` is set).
+    """
+    directory = Path(directory)
+    manifest = _read_json(directory / MANIFEST, {})
+    state = _read_json(directory / LOAD_STATE, {})
+    database = connection.settings_dict["NAME"]
+    loaded = [] if restart else state.get(database, [])
+
+    for table in tables:
+        if table.name not in manifest:
+            log(f"{table.name}: not dumped, skipped")
+            continue
+        if table.name in loaded:
+            log(f"{table.name}: already loaded, skipped")
+            continue
+
+        timer = Throughput()
+        rows = load_table(table, directory)
+        size = (directory / table.filename).stat().st_size
+        log(f"{table.name}: loaded {timer.report(rows, size)}")
+
+        loaded.append(table.name)
+        state[database] = loaded
+        _write_json(directory / LOAD_STATE, state)
+
+    bump_generations(Movie, Author)
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from cinema.cache import get_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Show API list cache hit/miss counters. Only meaningful with a cache "
+        "shared between processes (e.g. redis), `locmem` is per process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "names",
+            nargs="*",
+            default=["movie", "author"],
+            help="Cached endpoints to report (viewsets basename)",
+        )
+
+    def handle(self, names, **opts):
+        for name in names:
+            stats = get_stats(name)
+            total = stats["hits"] + stats["misses"]
+            ratio = stats["hits"] / total if total else 0
+            self.stdout.write(
+                f"{name}: {stats['hits']} hits - {stats['misses']} misses "
+                f"({ratio:.1%} hit ratio)"
+            )
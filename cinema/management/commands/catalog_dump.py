@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from cinema.catalog import TABLES, dump
+
+
+class Command(BaseCommand):
+    help = (
+        "Dump the TMDB catalog (authors, movies and their links) with "
+        "PostgreSQL COPY, one gzipped file per table. Tables already dumped "
+        "in the directory are skipped, so an interrupted dump resumes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", help="Dump directory")
+        parser.add_argument(
+            "--table",
+            action="append",
+            choices=[table.name for table in TABLES],
+            help="Only dump this table (repeatable)",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Dump again the tables already dumped",
+        )
+
+    def handle(self, directory, table=None, force=False, **opts):
+        tables = [t for t in TABLES if not table or t.name in table]
+        dump(directory, tables, force=force, log=self.stdout.write)
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from cinema.catalog import TABLES, load
+from cinema.routers import use_primary
+
+
+class Command(BaseCommand):
+    help = (
+        "Load a catalog_dump directory with PostgreSQL COPY. Rows are upserted "
+        "on tmdb_id, so that loading into a non-empty database never "
+        "duplicates them. Each table is loaded in its own transaction and "
+        "tables already loaded into this database are skipped, so an "
+        "interrupted load resumes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", help="Dump directory")
+        parser.add_argument(
+            "--table",
+            action="append",
+            choices=[table.name for table in TABLES],
+            help="Only load this table (repeatable)",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Load again the tables already loaded",
+        )
+
+    def handle(self, directory, table=None, restart=False, **opts):
+        tables = [t for t in TABLES if not table or t.name in table]
+        with use_primary():
+            load(directory, tables, restart=restart, log=self.stdout.write)
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from cinema.models import Author, Movie
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the denormalized evaluations aggregates (count, sum & "
+        "average score) of movies and authors, repairing any drift."
+    )
+
+    def handle(self, **opts):
+        for model in (Movie, Author):
+            repaired = model.recompute_evaluations()
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural}: {repaired} repaired"
+            )
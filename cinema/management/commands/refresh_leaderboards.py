@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from cinema.models import AuthorRanking, MovieRanking
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the movies & authors leaderboards served by `/api/movies/top/`"
+        " and `/api/authors/top/`. Meant to be run periodically (e.g. cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size",
+            type=int,
+            help="Entries kept per leaderboard (default: LEADERBOARD_SIZE)",
+        )
+
+    def handle(self, size=None, **opts):
+        for model in (MovieRanking, AuthorRanking):
+            entries = model.refresh(size)
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural}: {entries} entries"
+            )
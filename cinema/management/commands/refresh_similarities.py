@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from cinema.recommendations import refresh_similarities
+from cinema.routers import use_primary
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute similar movies of the movies whose favorites or "
+        "evaluations changed since the last run. Meant to be run "
+        "periodically (e.g. cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Recompute the similar movies of every movie",
+        )
+        parser.add_argument(
+            "--size",
+            type=int,
+            help="Similar movies kept per movie (default: RECOMMENDATIONS_SIZE)",
+        )
+
+    def handle(self, full=False, size=None, **opts):
+        # Reads the flags & favorites the refresh then writes over
+        with use_primary():
+            refreshed = refresh_similarities(full=full, size=size)
+        self.stdout.write(f"{refreshed} movies refreshed")
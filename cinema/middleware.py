@@ -0,0 +1,60 @@
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+
+from cinema.routers import mark_writer, pin_primary, pinning_scope
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Read-your-writes on top of `cinema.routers.ReplicaRouter`: unsafe
+    requests read from the primary only, and once one succeeded its user
+    keeps reading from the primary for `DATABASE_REPLICA_STICKINESS` seconds.
+
+    API users are only known once DRF authenticated them, reads of recent
+    writers are pinned from `api.authentication`.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        with pinning_scope():
+            self.process_request(request)
+            response = self.get_response(request)
+
+        self.process_response(request, response)
+        return response
+
+    async def __acall__(self, request):
+        with pinning_scope():
+            self.process_request(request)
+            response = await self.get_response(request)
+
+        await sync_to_async(self.process_response)(request, response)
+        return response
+
+    def process_request(self, request):
+        if request.method not in SAFE_METHODS:
+            pin_primary()
+
+    def process_response(self, request, response):
+        if request.method in SAFE_METHODS or response.status_code >= 400:
+            return
+
+        # Set by the authentication middleware or by DRF authentication
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            mark_writer(user.pk)
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:36
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+
+
+def populate_authors_search_vector(apps, schema_editor):
+    Author = apps.get_model("cinema", "Author")
+    vectors = (
+        Author.objects.filter(pk=models.OuterRef("pk"))
+        .annotate(
+            vector=SearchVector(
+                "first_name", "last_name", config="english", weight="A"
+            )
+            + SearchVector("biography", config="english", weight="B")
+        )
+        .values("vector")
+    )
+    Author.objects.update(search_vector=models.Subquery(vectors))
+
+
+# `gin_trgm_ops` indexes serving trigram lookups in `cinema.search`. They are
+# kept out of the models `Meta.indexes` since the operator class only exists
+# once `pg_trgm` is installed.
+TRIGRAM_INDEXES = [
+    ("movie_title_trgm_idx", "cinema_movie", "title"),
+    ("user_first_name_trgm_idx", "cinema_user", "first_name"),
+    ("user_last_name_trgm_idx", "cinema_user", "last_name"),
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cinema', '0005_versioned_movie_author'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='author',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('title', 'original_title', config='english', weight='A'), '||', django.contrib.postgres.search.SearchVector('description', config='english', weight='B'), django.contrib.postgres.search.SearchConfig('english')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='author',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='author_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='movie_search_idx'),
+        ),
+        migrations.RunPython(
+            populate_authors_search_vector, migrations.RunPython.noop
+        ),
+    ] + [
+        migrations.RunSQL(
+            f"CREATE INDEX {name} ON {table} USING gin ({column} gin_trgm_ops)",
+            f"DROP INDEX {name}",
+        )
+        for name, table, column in TRIGRAM_INDEXES
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cinema', '0007_evaluation_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(choices=[('rating', 'Top rated'), ('favorites', 'Most favorited'), ('evaluations', 'Most evaluated')], max_length=16)),
+                ('year', models.PositiveSmallIntegerField(blank=True, help_text='Release year, empty for the overall leaderboard', null=True)),
+                ('rank', models.PositiveIntegerField()),
+                ('score', models.FloatField()),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='cinema.author')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['board', 'year', 'rank'], name='author_ranking_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MovieRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(choices=[('rating', 'Top rated'), ('favorites', 'Most favorited'), ('evaluations', 'Most evaluated')], max_length=16)),
+                ('year', models.PositiveSmallIntegerField(blank=True, help_text='Release year, empty for the overall leaderboard', null=True)),
+                ('rank', models.PositiveIntegerField()),
+                ('score', models.FloatField()),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='cinema.movie')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['board', 'year', 'rank'], name='movie_ranking_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cinema', '0008_leaderboards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movie',
+            name='similarities_stale',
+            field=models.BooleanField(default=True, editable=False),
+        ),
+        migrations.CreateModel(
+            name='MovieSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveIntegerField()),
+                ('score', models.FloatField(help_text='Cosine similarity')),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similarities', to='cinema.movie')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_to', to='cinema.movie')),
+            ],
+            options={
+                'verbose_name_plural': 'Movie similarities',
+                'indexes': [models.Index(fields=['movie', 'rank'], name='movie_similarity_rank_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:06
+
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # `CREATE INDEX CONCURRENTLY` doesn't lock writes on live tables, but
+    # can't run in a transaction
+    atomic = False
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('cinema', '0009_movie_similarities'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='author',
+            index=models.Index(condition=models.Q(('creation_source', 'ADMIN')), fields=['user_ptr'], name='author_admin_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='movie',
+            index=models.Index(fields=['creation_source', 'title', '-release_date', 'id'], name='movie_source_keyset_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='movie',
+            index=models.Index(condition=models.Q(('similarities_stale', True)), fields=['id'], name='movie_similarities_stale_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Concat(django.db.models.functions.text.Lower(django.db.models.functions.comparison.Coalesce('last_name', models.Value(''))), models.Value(' '), django.db.models.functions.text.Lower(django.db.models.functions.comparison.Coalesce('first_name', models.Value(''))), output_field=models.CharField()), models.F('id'), name='user_full_name_sort_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:11
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # `CREATE INDEX CONCURRENTLY` can't run in a transaction
+    atomic = False
+
+    dependencies = [
+        ('cinema', '0010_api_access_path_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='author',
+            index=models.Index(fields=['birth_day'], name='author_birth_day_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='author',
+            index=models.Index(fields=['death_day'], name='author_death_day_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='movie',
+            index=models.Index(fields=['status', 'title', '-release_date', 'id'], name='movie_status_keyset_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='movie',
+            index=models.Index(fields=['evaluation', 'title', '-release_date', 'id'], name='movie_evaluation_keyset_idx'),
+        ),
+    ]
@@ -1,15 +1,165 @@
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import (
+    Cast,
+    Coalesce,
+    Concat,
+    ExtractYear,
+    Lower,
+    NullIf,
+    RowNumber,
+)
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
+# Text search configuration of `search_vector` columns, see `cinema.search`
+SEARCH_CONFIG = "english"
+
+
 class CreationSource(models.TextChoices):
     ADMIN = "ADMIN", "Admin"
     TMDB = "TMDB", "TMDb"
 
 
+class VersionedModel(models.Model):
+    """
+    Adds a modification date and a version stamp, bumped on every save, used to
+    answer conditional requests (`ETag` / `Last-Modified`) without loading
+    the whole object. Changes made with `QuerySet.update()` must bump them
+    explicitly, see `touch`.
+    """
+
+    updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        self.version += 1
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "updated_at", "version"}
+
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def touch(cls, pks):
+        """
+        Bumps version stamps of the given objects in a single UPDATE
+        """
+        return cls.objects.filter(pk__in=pks).update(
+            updated_at=timezone.now(), version=models.F("version") + 1
+        )
+
+
+class EvaluatedModel(models.Model):
+    """
+    Denormalized aggregates of the spectators evaluations of an object, kept
+    up to date incrementally on every evaluation change (see
+    `cinema.signals`) and repairable with the `recompute_evaluations`
+    command.
+    """
+
+    evaluations_count = models.PositiveIntegerField(default=0, editable=False)
+    score_sum = models.PositiveBigIntegerField(default=0, editable=False)
+    score_avg = models.FloatField(null=True, blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def add_evaluations(cls, pk, count, score):
+        """
+        Applies an evaluations `count` & `score` delta in a single UPDATE,
+        safe against concurrent changes. Also bumps the version stamps since
+        details representations embed the aggregates.
+        """
+        evaluations_count = models.F("evaluations_count") + count
+        score_sum = models.F("score_sum") + score
+        return cls.objects.filter(pk=pk).update(
+            evaluations_count=evaluations_count,
+            score_sum=score_sum,
+            score_avg=Cast(score_sum, models.FloatField())
+            / NullIf(evaluations_count, 0),
+            updated_at=timezone.now(),
+            version=models.F("version") + 1,
+        )
+
+    @classmethod
+    def recompute_evaluations(cls, queryset=None):
+        """
+        Recomputes aggregates from the evaluations table for the given objects
+        (all by default) whose stored aggregates drifted. Returns the number
+        of repaired objects.
+        """
+        if queryset is None:
+            queryset = cls.objects.all()
+
+        # Reverse relation of `Evaluation.target_field`
+        relation = cls._meta.get_field("evaluations")
+        target_field = relation.field.name
+        evaluations = relation.related_model.objects.filter(
+            **{target_field: models.OuterRef("pk")}
+        ).values(target_field)
+
+        def aggregate(function):
+            return models.Subquery(
+                evaluations.annotate(value=function("score")).values("value")
+            )
+
+        computed = queryset.annotate(
+            computed_count=Coalesce(aggregate(models.Count), 0),
+            computed_sum=Coalesce(aggregate(models.Sum), 0),
+        ).filter(
+            ~models.Q(evaluations_count=models.F("computed_count"))
+            | ~models.Q(score_sum=models.F("computed_sum"))
+        )
+
+        return cls.objects.filter(pk__in=computed.values("pk")).update(
+            evaluations_count=Coalesce(aggregate(models.Count), 0),
+            score_sum=Coalesce(aggregate(models.Sum), 0),
+            score_avg=aggregate(models.Avg),
+            updated_at=timezone.now(),
+            version=models.F("version") + 1,
+        )
+
+
+def full_name_sort():
+    """
+    Case insensitive "last first" name the admin sorts users on (see
+    `cinema.admin.FullNameColumnMixin`), indexed as is.
+    """
+    return Concat(
+        Lower(Coalesce("last_name", models.Value(""))),
+        models.Value(" "),
+        Lower(Coalesce("first_name", models.Value(""))),
+        output_field=models.CharField(),
+    )
+
+
 class User(AbstractUser):
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Serves `Author` keyset pagination (`last_name, first_name, id`)
+            models.Index(
+                fields=["last_name", "first_name", "id"],
+                name="user_name_keyset_idx",
+            ),
+            # Serves the admin "Full name" column sorting
+            models.Index(
+                full_name_sort(),
+                "id",
+                name="user_full_name_sort_idx",
+            ),
+        ]
+
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
@@ -18,10 +168,24 @@ class User(AbstractUser):
         return self.full_name
 
 
-class Author(User):
+class Author(User, VersionedModel, EvaluatedModel):
     class Meta:
         verbose_name = "Author"
         verbose_name_plural = "Authors"
+        indexes = [
+            GinIndex(fields=["search_vector"], name="author_search_idx"),
+            # Serves `?creation_source=admin`: the few authors created from
+            # the admin among the TMDB catalog. Names live in the parent
+            # table, the ordering can't be indexed along.
+            models.Index(
+                fields=["user_ptr"],
+                name="author_admin_idx",
+                condition=models.Q(creation_source="ADMIN"),
+            ),
+            # Serve `AuthorFilterSet` date ranges
+            models.Index(fields=["birth_day"], name="author_birth_day_idx"),
+            models.Index(fields=["death_day"], name="author_death_day_idx"),
+        ]
 
     # For every of those fields, we allow null with blank=True and null=True.
     # This means we didn't populate them via TMDB and it could be populated
@@ -38,6 +202,9 @@ class Author(User):
         default=CreationSource.ADMIN,
         editable=False,
     )
+    # Names live in the parent `cinema_user` table, which a generated column
+    # can't read: kept up to date by `refresh_search_vectors`.
+    search_vector = SearchVectorField(null=True, editable=False)
 
     @property
     def imdb_page(self):
@@ -46,6 +213,27 @@ class Author(User):
 
         return ""
 
+    @classmethod
+    def refresh_search_vectors(cls, queryset=None):
+        """
+        Recomputes `search_vector` of the given authors (all by default) in a
+        single UPDATE.
+        """
+        if queryset is None:
+            queryset = cls.objects.all()
+
+        vectors = (
+            cls.objects.filter(pk=models.OuterRef("pk"))
+            .annotate(
+                vector=SearchVector(
+                    "first_name", "last_name", config=SEARCH_CONFIG, weight="A"
+                )
+                + SearchVector("biography", config=SEARCH_CONFIG, weight="B")
+            )
+            .values("vector")
+        )
+        return queryset.update(search_vector=models.Subquery(vectors))
+
 
 class MovieStatus(models.TextChoices):
     UNKNOWN = "Unknown"
@@ -94,7 +282,43 @@ class MovieEvaluation(models.IntegerChoices):
 
 
 # Create your models here.
-class Movie(models.Model):
+class Movie(VersionedModel, EvaluatedModel):
+    class Meta:
+        indexes = [
+            # Serves keyset pagination (`title, -release_date, id`)
+            models.Index(
+                fields=["title", "-release_date", "id"],
+                name="movie_keyset_idx",
+            ),
+            # Serves `/movies/by-year/` date ranges
+            models.Index(
+                fields=["release_date"],
+                name="movie_release_date_idx",
+            ),
+            # Serves `?creation_source=` with the default ordering
+            models.Index(
+                fields=["creation_source", "title", "-release_date", "id"],
+                name="movie_source_keyset_idx",
+            ),
+            # Serve `MovieFilterSet` `status` & `evaluation` filters with the
+            # default ordering
+            models.Index(
+                fields=["status", "title", "-release_date", "id"],
+                name="movie_status_keyset_idx",
+            ),
+            models.Index(
+                fields=["evaluation", "title", "-release_date", "id"],
+                name="movie_evaluation_keyset_idx",
+            ),
+            # Serves `refresh_similarities` lookup of the flagged movies
+            models.Index(
+                fields=["id"],
+                name="movie_similarities_stale_idx",
+                condition=models.Q(similarities_stale=True),
+            ),
+            GinIndex(fields=["search_vector"], name="movie_search_idx"),
+        ]
+
     title = models.CharField(max_length=300)
     imdb_id = models.CharField(max_length=150, blank=True)
     tmdb_id = models.IntegerField(null=True, blank=True, unique=True)
@@ -128,6 +352,25 @@ class Movie(models.Model):
 
     authors = models.ManyToManyField(Author, related_name="movies")
 
+    # Set when favorites/evaluations involving this movie changed since its
+    # similar movies were last computed, see `cinema.recommendations`.
+    similarities_stale = models.BooleanField(default=True, editable=False)
+
+    search_vector = models.GeneratedField(
+        expression=SearchVector(
+            "title", "original_title", config=SEARCH_CONFIG, weight="A"
+        )
+        + SearchVector("description", config=SEARCH_CONFIG, weight="B"),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    @classmethod
+    def mark_similarities_stale(cls, pks):
+        cls.objects.filter(pk__in=pks, similarities_stale=False).update(
+            similarities_stale=True
+        )
+
     @property
     def imdb_page(self):
         if self.imdb_id:
@@ -171,11 +414,80 @@ class Evaluation(models.Model):
     )
     comment = models.TextField(blank=True)
 
+    # Name of the evaluated object foreign key
+    target_field = None
+
     class Meta:
         abstract = True
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.track_loaded_values()
+        return instance
+
+    def track_loaded_values(self):
+        """
+        Remembers the score & evaluated object as stored in DB, so that saves
+        can update the evaluated object aggregates with the right delta.
+        """
+        attname = self._meta.get_field(self.target_field).attname
+        self._loaded_values = {
+            "target_id": self.__dict__.get(attname),
+            "score": self.__dict__.get("score"),
+        }
+
+    @classmethod
+    @transaction.atomic
+    def bulk_upsert(cls, spectator, evaluations):
+        """
+        Creates or updates `spectator` evaluations (dicts of `<target>_id`,
+        `score` & `comment`) with a single `INSERT ... ON CONFLICT DO UPDATE`,
+        then recomputes the evaluated objects aggregates in one UPDATE since
+        signals aren't sent. The last evaluation of a same object wins.
+
+        Returns the ids of the objects evaluated for the first time.
+        """
+        target_field = cls._meta.get_field(cls.target_field)
+        evaluations = {
+            evaluation[target_field.attname]: evaluation
+            for evaluation in evaluations
+        }
+        existing = set(
+            cls.objects.filter(
+                spectator=spectator,
+                **{f"{target_field.attname}__in": evaluations},
+            ).values_list(target_field.attname, flat=True)
+        )
+
+        cls.objects.bulk_create(
+            [
+                cls(spectator=spectator, **evaluation)
+                for evaluation in evaluations.values()
+            ],
+            update_conflicts=True,
+            unique_fields=["spectator", cls.target_field],
+            update_fields=["score", "comment"],
+        )
+
+        target_field.related_model.recompute_evaluations(
+            target_field.related_model.objects.filter(pk__in=evaluations)
+        )
+        return set(evaluations) - existing
+
 
 class SpectatorMovieEvaluation(Evaluation):
+    target_field = "movie"
+
+    @classmethod
+    def bulk_upsert(cls, spectator, evaluations):
+        evaluations = list(evaluations)
+        created = super().bulk_upsert(spectator, evaluations)
+        Movie.mark_similarities_stale(
+            [evaluation["movie_id"] for evaluation in evaluations]
+        )
+        return created
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
@@ -198,6 +510,8 @@ class SpectatorMovieEvaluation(Evaluation):
 
 
 class SpectatorAuthorEvaluation(Evaluation):
+    target_field = "author"
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
@@ -215,3 +529,194 @@ class SpectatorAuthorEvaluation(Evaluation):
 
     def __str__(self):
         return f"{self.spectator.full_name} evaluation on {self.author.full_name} author"
+
+
+# Leaderboards
+class Ranking(models.Model):
+    """
+    Materialized leaderboard entry, rebuilt in bulk by `refresh()` (see the
+    `refresh_leaderboards` command) so that reading a leaderboard page is a
+    plain index range scan on `(board, year, rank)`.
+    """
+
+    class Board(models.TextChoices):
+        RATING = "rating", _("Top rated")
+        FAVORITES = "favorites", _("Most favorited")
+        EVALUATIONS = "evaluations", _("Most evaluated")
+
+    board = models.CharField(max_length=16, choices=Board.choices)
+    year = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        help_text="Release year, empty for the overall leaderboard",
+    )
+    rank = models.PositiveIntegerField()
+    score = models.FloatField()
+
+    # Name of the ranked object foreign key
+    target_field = None
+    # Date field whose year splits per-year leaderboards, if any
+    year_field = None
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def get_board_queryset(cls, board):
+        """
+        Ranked objects of `board`, annotated with their `ranking_score`.
+
+        Ratings use a Bayesian average, `(C * m + score_sum) / (C + count)`
+        with `m` the mean score over all evaluations and `C` the
+        `LEADERBOARD_PRIOR_WEIGHT` setting: objects with few evaluations are
+        pulled towards the mean instead of topping the board with a single
+        perfect score.
+        """
+        target = cls._meta.get_field(cls.target_field).related_model
+        queryset = target.objects.all()
+
+        if board == cls.Board.RATING:
+            totals = queryset.aggregate(
+                score_sum=models.Sum("score_sum"),
+                count=models.Sum("evaluations_count"),
+            )
+            if not totals["count"]:
+                return queryset.annotate(
+                    ranking_score=models.Value(0.0, models.FloatField())
+                ).none()
+
+            weight = settings.LEADERBOARD_PRIOR_WEIGHT
+            mean = totals["score_sum"] / totals["count"]
+            return queryset.filter(evaluations_count__gt=0).annotate(
+                ranking_score=(
+                    models.Value(weight * mean)
+                    + Cast("score_sum", models.FloatField())
+                )
+                / (models.F("evaluations_count") + models.Value(weight))
+            )
+
+        if board == cls.Board.FAVORITES:
+            score = models.Count("favorited_by")
+        else:
+            score = models.F("evaluations_count")
+
+        return queryset.annotate(
+            ranking_score=Cast(score, models.FloatField())
+        ).filter(ranking_score__gt=0)
+
+    @classmethod
+    def compute(cls, size):
+        """
+        Yields unsaved entries of the `size` first objects of every board,
+        overall and per year when `year_field` is set.
+        """
+        target_attname = cls._meta.get_field(cls.target_field).attname
+
+        for board in cls.Board:
+            queryset = cls.get_board_queryset(board)
+
+            partitions = [None]
+            if cls.year_field:
+                partitions.append(ExtractYear(cls.year_field))
+
+            for year in partitions:
+                ranked = queryset
+                if year is not None:
+                    ranked = ranked.filter(
+                        **{f"{cls.year_field}__isnull": False}
+                    )
+
+                ranked = ranked.annotate(
+                    ranking_year=year
+                    or models.Value(None, output_field=models.IntegerField()),
+                    ranking_rank=models.Window(
+                        RowNumber(),
+                        partition_by=year,
+                        order_by=[
+                            models.F("ranking_score").desc(),
+                            models.F("pk").asc(),
+                        ],
+                    ),
+                ).filter(ranking_rank__lte=size)
+
+                for row in ranked.values(
+                    "pk", "ranking_year", "ranking_rank", "ranking_score"
+                ):
+                    yield cls(
+                        board=board,
+                        year=row["ranking_year"],
+                        rank=row["ranking_rank"],
+                        score=row["ranking_score"],
+                        **{target_attname: row["pk"]},
+                    )
+
+    @classmethod
+    @transaction.atomic
+    def refresh(cls, size=None):
+        """
+        Rebuilds every leaderboard in a single transaction: readers keep
+        seeing the previous entries until it commits. Returns the number of
+        entries.
+        """
+        if size is None:
+            size = settings.LEADERBOARD_SIZE
+
+        entries = list(cls.compute(size))
+        cls.objects.all().delete()
+        cls.objects.bulk_create(entries, batch_size=1000)
+        return len(entries)
+
+
+class MovieRanking(Ranking):
+    target_field = "movie"
+    year_field = "release_date"
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["board", "year", "rank"], name="movie_ranking_idx"
+            )
+        ]
+
+    movie = models.ForeignKey(
+        Movie, related_name="rankings", on_delete=models.CASCADE
+    )
+
+
+class AuthorRanking(Ranking):
+    target_field = "author"
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["board", "year", "rank"], name="author_ranking_idx"
+            )
+        ]
+
+    author = models.ForeignKey(
+        Author, related_name="rankings", on_delete=models.CASCADE
+    )
+
+
+class MovieSimilarity(models.Model):
+    """
+    Precomputed `RECOMMENDATIONS_SIZE` most similar movies of each movie, see
+    `cinema.recommendations`.
+    """
+
+    movie = models.ForeignKey(
+        Movie, related_name="similarities", on_delete=models.CASCADE
+    )
+    similar = models.ForeignKey(
+        Movie, related_name="similar_to", on_delete=models.CASCADE
+    )
+    rank = models.PositiveIntegerField()
+    score = models.FloatField(help_text="Cosine similarity")
+
+    class Meta:
+        verbose_name_plural = "Movie similarities"
+        indexes = [
+            models.Index(
+                fields=["movie", "rank"], name="movie_similarity_rank_idx"
+            )
+        ]
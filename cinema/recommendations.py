@@ -0,0 +1,238 @@
+"""
+Item-item movie recommendations.
+
+Spectators interactions are loaded once into a sparse spectators × movies
+matrix `R`:
+
+- a favorite movie counts for `FAVORITE_WEIGHT`,
+- an evaluation for `(score - 50) / 50`, so that bad scores push movies apart,
+- a favorite author counts for `FAVORITE_AUTHOR_WEIGHT` on each of their
+  movies.
+
+With `R` columns L2-normalized, the cosine similarity of every movie pair is
+`R.T @ R`, computed by chunks of rows so that memory stays bounded. Only the
+`RECOMMENDATIONS_SIZE` most similar movies of each movie are stored in
+`MovieSimilarity`, which requests then read with plain index scans.
+"""
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from scipy import sparse
+
+from cinema.models import (
+    Movie,
+    MovieSimilarity,
+    Spectator,
+    SpectatorMovieEvaluation,
+)
+
+FAVORITE_WEIGHT = 1.0
+FAVORITE_AUTHOR_WEIGHT = 0.25
+
+# Rows of the similarity matrix computed at once
+CHUNK_SIZE = 1000
+
+
+def _pairs(queryset, columns):
+    rows = np.array(list(queryset), dtype=np.float64)
+    return rows.reshape(-1, columns).T
+
+
+def _matrix(rows, cols, values, shape):
+    return sparse.csr_matrix((values, (rows, cols)), shape=shape)
+
+
+def interactions_matrix():
+    """
+    Returns the spectators × movies interactions matrix, in CSC format, and
+    the movie id of each column (sorted).
+    """
+    favorites = _pairs(
+        Spectator.favorite_movies.through.objects.values_list(
+            "spectator_id", "movie_id"
+        ),
+        2,
+    )
+    evaluations = _pairs(
+        SpectatorMovieEvaluation.objects.values_list(
+            "spectator_id", "movie_id", "score"
+        ),
+        3,
+    )
+    favorite_authors = _pairs(
+        Spectator.favorite_authors.through.objects.values_list(
+            "spectator_id", "author_id"
+        ),
+        2,
+    )
+    authorships = _pairs(
+        Movie.authors.through.objects.filter(author__favorited_by__isnull=False)
+        .distinct()
+        .values_list("author_id", "movie_id"),
+        2,
+    )
+
+    spectator_ids, spectators = np.unique(
+        np.concatenate([favorites[0], evaluations[0], favorite_authors[0]]),
+        return_inverse=True,
+    )
+    movie_ids, movies = np.unique(
+        np.concatenate([favorites[1], evaluations[1], authorships[1]]),
+        return_inverse=True,
+    )
+    author_ids, authors = np.unique(
+        np.concatenate([favorite_authors[1], authorships[0]]),
+        return_inverse=True,
+    )
+
+    # Split the inverse indices back per source
+    bounds = np.cumsum([favorites.shape[1], evaluations.shape[1]])
+    favorites_spectators, evaluations_spectators, fa_spectators = np.split(
+        spectators, bounds
+    )
+    favorites_movies, evaluations_movies, authorships_movies = np.split(
+        movies, bounds
+    )
+    fa_authors, authorships_authors = np.split(
+        authors, [favorite_authors.shape[1]]
+    )
+
+    shape = (len(spectator_ids), len(movie_ids))
+    matrix = _matrix(
+        favorites_spectators,
+        favorites_movies,
+        np.full(len(favorites_movies), FAVORITE_WEIGHT),
+        shape,
+    )
+    matrix += _matrix(
+        evaluations_spectators,
+        evaluations_movies,
+        (evaluations[2] - 50) / 50,
+        shape,
+    )
+    matrix += FAVORITE_AUTHOR_WEIGHT * (
+        _matrix(
+            fa_spectators,
+            fa_authors,
+            np.ones(len(fa_authors)),
+            (len(spectator_ids), len(author_ids)),
+        )
+        @ _matrix(
+            authorships_authors,
+            authorships_movies,
+            np.ones(len(authorships_movies)),
+            (len(author_ids), len(movie_ids)),
+        )
+    )
+
+    return matrix.tocsc(), movie_ids.astype(np.int64)
+
+
+def normalize_columns(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0))).ravel()
+    norms[norms == 0] = 1
+    return (matrix @ sparse.diags(1 / norms)).tocsc()
+
+
+def cooccurring_columns(matrix, columns):
+    """
+    Columns sharing at least one row with any of `columns`: the only movies
+    whose similarities can change when `columns` interactions change.
+    """
+    rows = np.unique(matrix[:, columns].indices)
+    return np.unique(matrix.tocsr()[rows].indices)
+
+
+def top_similar(matrix, columns, size):
+    """
+    Yields `(column, similar_columns, scores)` for each of `columns`, with the
+    `size` most similar other columns of `matrix` (positive cosine only),
+    best first.
+    """
+    transposed = matrix.T.tocsr()
+
+    for start in range(0, len(columns), CHUNK_SIZE):
+        chunk = columns[start : start + CHUNK_SIZE]
+        similarities = (transposed[chunk] @ matrix).tocsr()
+
+        for row, column in enumerate(chunk):
+            bounds = slice(
+                similarities.indptr[row], similarities.indptr[row + 1]
+            )
+            similar = similarities.indices[bounds]
+            scores = similarities.data[bounds]
+
+            keep = (similar != column) & (scores > 0)
+            similar, scores = similar[keep], scores[keep]
+
+            if len(scores) > size:
+                best = np.argpartition(-scores, size)[:size]
+                similar, scores = similar[best], scores[best]
+
+            # Best first, ties broken by movie id (columns are sorted by id)
+            order = np.lexsort((similar, -scores))
+            yield column, similar[order], scores[order]
+
+
+def refresh_similarities(full=False, size=None):
+    """
+    Recomputes the stored similar movies of the movies flagged with
+    `similarities_stale` and of the movies co-occurring with them, or of
+    every movie when `full` is set. Returns the number of refreshed movies.
+    """
+    if size is None:
+        size = settings.RECOMMENDATIONS_SIZE
+
+    with transaction.atomic():
+        stale = Movie.objects.all()
+        if not full:
+            stale = stale.filter(similarities_stale=True)
+        stale_ids = list(stale.values_list("pk", flat=True))
+        # Cleared before reading interactions: changes made from now on flag
+        # the movies again for the next run.
+        Movie.objects.filter(pk__in=stale_ids).update(similarities_stale=False)
+
+    if not stale_ids:
+        return 0
+
+    matrix, movie_ids = interactions_matrix()
+    matrix = normalize_columns(matrix)
+
+    affected_ids = set(stale_ids)
+    if full:
+        columns = np.arange(len(movie_ids))
+    else:
+        # Movies currently listing a stale movie may have to drop it
+        affected_ids.update(
+            MovieSimilarity.objects.filter(similar__in=stale_ids).values_list(
+                "movie", flat=True
+            )
+        )
+        columns = np.union1d(
+            cooccurring_columns(
+                matrix, np.flatnonzero(np.isin(movie_ids, stale_ids))
+            ),
+            np.flatnonzero(np.isin(movie_ids, list(affected_ids))),
+        )
+
+    affected_ids.update(int(movie_ids[column]) for column in columns)
+    similarities = [
+        MovieSimilarity(
+            movie_id=int(movie_ids[column]),
+            similar_id=int(movie_ids[similar_column]),
+            rank=rank,
+            score=float(score),
+        )
+        for column, similar, scores in top_similar(matrix, columns, size)
+        for rank, (similar_column, score) in enumerate(
+            zip(similar, scores), start=1
+        )
+    ]
+
+    with transaction.atomic():
+        # Movies without interactions anymore lose their similarities too
+        MovieSimilarity.objects.filter(movie__in=affected_ids).delete()
+        MovieSimilarity.objects.bulk_create(similarities, batch_size=1000)
+
+    return len(affected_ids)
@@ -0,0 +1,98 @@
+"""
+Read replicas routing.
+
+Reads go to one of `DATABASE_REPLICAS`, picked at random, and writes to the
+primary (`default`). Reads still go to the primary:
+
+- inside transactions, so that read-modify-write sequences see their writes,
+- for the rest of the current request (or `use_primary()` block) once
+  `pin_primary()` was called. `cinema.middleware.ReplicaStickinessMiddleware`
+  does it for unsafe requests, and for the users who wrote something in the
+  last `DATABASE_REPLICA_STICKINESS` seconds (read-your-writes).
+- in `use_primary()` blocks, e.g. the management commands reading the rows
+  they then update (`tmdb`, `refresh_similarities`, `catalog_load`).
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+WRITER_KEY = "cinema:writer:{user_id}"
+
+_primary = ContextVar("cinema_primary", default=False)
+
+
+def pin_primary():
+    _primary.set(True)
+
+
+@contextmanager
+def pinning_scope():
+    """
+    Scopes the `pin_primary()` calls made in the block (e.g. a request).
+    """
+    token = _primary.set(False)
+    try:
+        yield
+    finally:
+        _primary.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """
+    Routes every read of the block to the primary.
+    """
+    token = _primary.set(True)
+    try:
+        yield
+    finally:
+        _primary.reset(token)
+
+
+def mark_writer(user_id):
+    """
+    Pins the reads of `user_id` to the primary for the next
+    `DATABASE_REPLICA_STICKINESS` seconds.
+    """
+    if settings.DATABASE_REPLICAS and settings.DATABASE_REPLICA_STICKINESS:
+        cache.set(
+            WRITER_KEY.format(user_id=user_id),
+            True,
+            settings.DATABASE_REPLICA_STICKINESS,
+        )
+
+
+def is_recent_writer(user_id):
+    return bool(settings.DATABASE_REPLICAS) and bool(
+        cache.get(WRITER_KEY.format(user_id=user_id))
+    )
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas
+            or _primary.get()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        # Explicit, otherwise instances loaded from a replica would be saved
+        # there
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
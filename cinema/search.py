@@ -0,0 +1,78 @@
+from functools import cache
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramWordSimilarity,
+)
+from django.db import connection
+from django.db.models import F, Q, Value
+from django.db.models.functions import Greatest
+
+from cinema.models import SEARCH_CONFIG, Author, Movie
+
+
+@cache
+def has_trigram_extension() -> bool:
+    """
+    Whether `pg_trgm` is installed (by the `0006_search_vectors` migration).
+    Without it, searches only rely on full-text matching.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def _search(queryset, text, trigram_fields):
+    """
+    Filters `queryset` rows matching `text`, either through their GIN indexed
+    `search_vector` or, to tolerate typos, through trigram similarity on
+    `trigram_fields`, and annotates them with a `rank`.
+    """
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+    matches = Q(search_vector=query)
+    rank = SearchRank(F("search_vector"), query)
+
+    if has_trigram_extension():
+        for field in trigram_fields:
+            matches |= Q(**{f"{field}__trigram_word_similar": text})
+
+        similarities = [
+            TrigramWordSimilarity(text, field) for field in trigram_fields
+        ]
+        rank += (
+            Greatest(*similarities)
+            if len(similarities) > 1
+            else similarities[0]
+        )
+
+    return queryset.filter(matches).annotate(rank=rank)
+
+
+def search_movies(text):
+    return _search(Movie.objects.all(), text, ["title"])
+
+
+def search_authors(text):
+    return _search(Author.objects.all(), text, ["first_name", "last_name"])
+
+
+def search(text, kinds=("movie", "author")):
+    """
+    Ranked `{"id", "rank", "type"}` rows of movies and authors matching
+    `text`, best matches first.
+    """
+    searches = {"movie": search_movies, "author": search_authors}
+
+    querysets = [
+        searches[kind](text)
+        .annotate(type=Value(kind))
+        .values("id", "rank", "type")
+        for kind in kinds
+    ]
+
+    results = querysets[0]
+    if len(querysets) > 1:
+        results = results.union(*querysets[1:], all=True)
+
+    return results.order_by("-rank", "type", "id")
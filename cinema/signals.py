@@ -0,0 +1,184 @@
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.db.models import Q
+from django.dispatch import receiver
+
+from cinema.cache import bump_generations
+from cinema.models import (
+    Author,
+    Movie,
+    Spectator,
+    SpectatorAuthorEvaluation,
+    SpectatorMovieEvaluation,
+)
+
+
+@receiver(post_save, sender=Movie)
+@receiver(post_delete, sender=Movie)
+def movie_changed(sender, **kwargs):
+    bump_generations(Movie)
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+def author_changed(sender, **kwargs):
+    bump_generations(Author)
+
+
+@receiver(post_save, sender=Author)
+def refresh_author_search_vector(sender, instance, **kwargs):
+    Author.refresh_search_vectors(Author.objects.filter(pk=instance.pk))
+
+
+# Movie details embed their authors and author details embed their movies:
+# a change on one side must bump the version stamps of the other.
+@receiver(post_save, sender=Movie)
+@receiver(pre_delete, sender=Movie)
+def touch_movie_authors(sender, instance, created=False, **kwargs):
+    if not created:
+        Author.touch(instance.authors.values("pk"))
+
+
+@receiver(post_save, sender=Author)
+@receiver(pre_delete, sender=Author)
+def touch_author_movies(sender, instance, created=False, **kwargs):
+    if not created:
+        Movie.touch(instance.movies.values("pk"))
+
+
+@receiver(m2m_changed, sender=Movie.authors.through)
+def movie_authors_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear":
+        # `pk_set` isn't provided on clear, touch the objects still linked
+        if reverse:
+            Movie.touch(instance.movies.values("pk"))
+        else:
+            Author.touch(instance.authors.values("pk"))
+        type(instance).touch([instance.pk])
+
+    if action in ("post_add", "post_remove") and pk_set:
+        if reverse:
+            Movie.touch(pk_set)
+        else:
+            Author.touch(pk_set)
+        type(instance).touch([instance.pk])
+
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_generations(Movie, Author)
+
+
+# Similar movies (see `cinema.recommendations`) depend on favorites,
+# evaluations and authorships: flag the involved movies for the next refresh.
+@receiver(m2m_changed, sender=Spectator.favorite_movies.through)
+def favorite_movies_changed(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action == "pre_clear" and not reverse:
+        Movie.mark_similarities_stale(instance.favorite_movies.values("pk"))
+    elif action == "pre_clear" or (
+        action in ("post_add", "post_remove") and reverse
+    ):
+        Movie.mark_similarities_stale([instance.pk])
+    elif action in ("post_add", "post_remove") and pk_set:
+        Movie.mark_similarities_stale(pk_set)
+
+
+@receiver(m2m_changed, sender=Spectator.favorite_authors.through)
+def favorite_authors_changed(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action == "pre_clear" and not reverse:
+        movies = Movie.objects.filter(authors__favorited_by=instance)
+    elif action == "pre_clear" or (
+        action in ("post_add", "post_remove") and reverse
+    ):
+        movies = instance.movies.all()
+    elif action in ("post_add", "post_remove") and pk_set:
+        movies = Movie.objects.filter(authors__in=pk_set)
+    else:
+        return
+
+    Movie.mark_similarities_stale(movies.values("pk"))
+
+
+@receiver(m2m_changed, sender=Movie.authors.through)
+def authorships_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse and action in ("pre_clear", "post_add", "post_remove"):
+        Movie.mark_similarities_stale([instance.pk])
+    elif action == "pre_clear":
+        Movie.mark_similarities_stale(instance.movies.values("pk"))
+    elif action in ("post_add", "post_remove") and pk_set:
+        Movie.mark_similarities_stale(pk_set)
+
+
+# Deletions cascade to the M2M tables without `m2m_changed` signals
+@receiver(pre_delete, sender=Spectator)
+def spectator_deleted(sender, instance, **kwargs):
+    Movie.mark_similarities_stale(
+        Movie.objects.filter(
+            Q(favorited_by=instance) | Q(authors__favorited_by=instance)
+        ).values("pk")
+    )
+
+
+@receiver(pre_delete, sender=Author)
+def author_deleted(sender, instance, **kwargs):
+    Movie.mark_similarities_stale(instance.movies.values("pk"))
+
+
+# Author lists filter on authorships (`has_movies`)
+@receiver(pre_delete, sender=Movie)
+def movie_deleted(sender, instance, **kwargs):
+    instance._had_authors = instance.authors.exists()
+
+
+@receiver(post_delete, sender=Movie)
+def movie_authorships_deleted(sender, instance, **kwargs):
+    if getattr(instance, "_had_authors", False):
+        bump_generations(Author)
+
+
+# Connected before `evaluation_saved`, which resets `_loaded_values`
+@receiver(post_save, sender=SpectatorMovieEvaluation)
+@receiver(post_delete, sender=SpectatorMovieEvaluation)
+def movie_evaluation_changed(sender, instance, **kwargs):
+    loaded = getattr(instance, "_loaded_values", None) or {}
+    Movie.mark_similarities_stale(
+        {instance.movie_id, loaded.get("target_id", instance.movie_id)}
+    )
+
+
+@receiver(post_save, sender=SpectatorMovieEvaluation)
+@receiver(post_save, sender=SpectatorAuthorEvaluation)
+def evaluation_saved(sender, instance, created, **kwargs):
+    target_model = sender._meta.get_field(sender.target_field).related_model
+    target_id = getattr(instance, f"{sender.target_field}_id")
+    loaded = getattr(instance, "_loaded_values", None)
+
+    if created or loaded is None:
+        target_model.add_evaluations(target_id, 1, instance.score)
+    elif loaded["target_id"] != target_id:
+        # Moved to another movie/author (possible from the admin)
+        target_model.add_evaluations(loaded["target_id"], -1, -loaded["score"])
+        target_model.add_evaluations(target_id, 1, instance.score)
+    elif loaded["score"] != instance.score:
+        target_model.add_evaluations(
+            target_id, 0, instance.score - loaded["score"]
+        )
+
+    instance.track_loaded_values()
+
+
+@receiver(post_delete, sender=SpectatorMovieEvaluation)
+@receiver(post_delete, sender=SpectatorAuthorEvaluation)
+def evaluation_deleted(sender, instance, **kwargs):
+    target_model = sender._meta.get_field(sender.target_field).related_model
+    loaded = getattr(instance, "_loaded_values", None) or {
+        "target_id": getattr(instance, f"{sender.target_field}_id"),
+        "score": instance.score,
+    }
+    target_model.add_evaluations(loaded["target_id"], -1, -loaded["score"])
@@ -10,8 +10,10 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import tempfile
 from pathlib import Path
 
+import dj_database_url
 from environs import env
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -37,6 +39,7 @@ INSTALLED_APPS = [
     "django.contrib.auth",
     "django.contrib.contenttypes",
     "django.contrib.messages",
+    "django.contrib.postgres",
     "django.contrib.sessions",
     "django.contrib.sites",
     "django.contrib.staticfiles",
@@ -62,6 +65,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "cinema.middleware.ReplicaStickinessMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -96,6 +100,48 @@ DATABASES = {
     "default": env.dj_db_url("DATABASE_URL", default="postgres:///cinema"),
 }
 
+# Read replicas, e.g "postgres://replica1/cinema,postgres://replica2/cinema":
+# safe reads are spread over them, writes go to `DATABASE_URL` (see
+# `cinema.routers`). Tests read them from the primary test database.
+DATABASE_REPLICAS = []
+for index, url in enumerate(env.list("DATABASE_REPLICA_URLS", default=[]), 1):
+    DATABASES[f"replica{index}"] = {
+        **dj_database_url.parse(url),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica{index}")
+
+DATABASE_ROUTERS = ["cinema.routers.ReplicaRouter"]
+
+# Connections to each database (replicas included) are either:
+# - pooled with psycopg's pool when `DATABASE_POOL_MAX_SIZE` is set: each
+#   process keeps between `DATABASE_POOL_MIN_SIZE` and `DATABASE_POOL_MAX_SIZE`
+#   connections open, shared by its threads, and a request waits up to
+#   `DATABASE_POOL_TIMEOUT` seconds for a free one (see "Database connections"
+#   in the README for sizing),
+# - or kept open by each thread for `DATABASE_CONN_MAX_AGE` seconds.
+DATABASE_POOL_MIN_SIZE = env.int("DATABASE_POOL_MIN_SIZE", default=2)
+DATABASE_POOL_MAX_SIZE = env.int("DATABASE_POOL_MAX_SIZE", default=0)
+DATABASE_POOL_TIMEOUT = env.float("DATABASE_POOL_TIMEOUT", default=10.0)
+DATABASE_CONN_MAX_AGE = env.int(
+    "DATABASE_CONN_MAX_AGE", default=0 if DEBUG else 60
+)
+
+for database in DATABASES.values():
+    database["CONN_HEALTH_CHECKS"] = not DEBUG
+    if DATABASE_POOL_MAX_SIZE:
+        database.setdefault("OPTIONS", {})["pool"] = {
+            "min_size": min(DATABASE_POOL_MIN_SIZE, DATABASE_POOL_MAX_SIZE),
+            "max_size": DATABASE_POOL_MAX_SIZE,
+            "timeout": DATABASE_POOL_TIMEOUT,
+        }
+    else:
+        database["CONN_MAX_AGE"] = DATABASE_CONN_MAX_AGE
+
+# Seconds during which users who just wrote something keep reading from the
+# primary, so that they see their own writes despite the replication lag.
+DATABASE_REPLICA_STICKINESS = env.int("DATABASE_REPLICA_STICKINESS", default=5)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -158,6 +204,42 @@ else:
 # Parse cache URLS, e.g "redis://localhost:6379/0"
 CACHES = {"default": env.dj_cache_url("CACHE_URL", default="locmem://")}
 
+# Lifetime of cached `/api/movies/` & `/api/authors/` pages, in seconds. Entries
+# are invalidated as soon as the catalog changes, see `cinema.signals`.
+API_LIST_CACHE_TIMEOUT = env.int("API_LIST_CACHE_TIMEOUT", default=5 * 60)
+
+# Serve list endpoints from `.values()` rows with hand written serializers
+# (see `api.serializers.ValuesSerializer`) rather than `ModelSerializer`s.
+API_FAST_LIST_SERIALIZERS = env.bool("API_FAST_LIST_SERIALIZERS", default=False)
+
+# Maximum number of ids a `/api/movies/?ids=` & `/api/authors/?ids=` batch
+# retrieve accepts (see `api.viewsets.BatchRetrieveMixin`).
+API_BATCH_MAX_IDS = env.int("API_BATCH_MAX_IDS", default=100)
+
+# Lifetime, in seconds, of the per process cache of authenticated users (see
+# `api.authentication`), disabled by default. Keep it short: a user change only
+# clears the cache of the process it was made in.
+API_USER_CACHE_TIMEOUT = env.int("API_USER_CACHE_TIMEOUT", default=0)
+
+# Storage of the throttling counters (see `api.throttling`), shared by every
+# worker: a SQLite file on the host by default, or the default cache with
+# "api.throttling.CacheThrottleBackend" (e.g. when `CACHE_URL` is a redis).
+API_THROTTLE_BACKEND = env.str(
+    "API_THROTTLE_BACKEND", default="api.throttling.SQLiteThrottleBackend"
+)
+API_THROTTLE_SQLITE_PATH = env.str(
+    "API_THROTTLE_SQLITE_PATH",
+    default=str(Path(tempfile.gettempdir()) / "cinema-throttle.sqlite3"),
+)
+
+# Number of entries kept per leaderboard (see `cinema.models.Ranking`) and
+# weight, in evaluations, of the mean score prior in the Bayesian average.
+LEADERBOARD_SIZE = env.int("LEADERBOARD_SIZE", default=100)
+LEADERBOARD_PRIOR_WEIGHT = env.int("LEADERBOARD_PRIOR_WEIGHT", default=10)
+
+# Number of similar movies kept per movie, see `cinema.recommendations`
+RECOMMENDATIONS_SIZE = env.int("RECOMMENDATIONS_SIZE", default=20)
+
 SITE_ID = 1
 
 REST_FRAMEWORK = {
@@ -165,7 +247,18 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.DjangoModelPermissionsOrAnonReadOnly",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.ConcreteUserJWTAuthentication",
+    ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.OrjsonRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+        "api.renderers.MessagePackRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "rest_framework.parsers.JSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+        "api.parsers.MessagePackParser",
     ],
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
@@ -173,8 +266,8 @@ REST_FRAMEWORK = {
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.UserRateThrottle",
-        "rest_framework.throttling.AnonRateThrottle",
+        "api.throttling.UserRateThrottle",
+        "api.throttling.AnonRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {"user": "2000/hour", "anon": "500/hour"},
     "PAGE_SIZE": 50,
@@ -183,10 +276,9 @@ REST_FRAMEWORK = {
 # "prod" mode additionnal configuration & safety checks
 if not DEBUG:
     REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = [
-        "rest_framework.renderers.JSONRenderer",
+        "api.renderers.OrjsonRenderer",
+        "api.renderers.MessagePackRenderer",
     ]
 
     CRSF_COOKIE_SECURE = True
     SESSION_COOKIE_SECURE = True
-    CONN_MAX_AGE = 60  # one minute persistence for each DB connection
-    CONN_HEALTH_CHECKS = True
@@ -3,6 +3,8 @@ from __future__ import annotations
 import logging
 
 import pytest
+from django.core.cache import cache
+from django.db import DatabaseError, connection
 
 logging.disable(logging.CRITICAL)
 
@@ -31,3 +33,49 @@ def use_test_settings(settings):
     }
 
     settings.WHITENOISE_AUTOREFRESH = True
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from api.authentication import _users
+    from api.throttling import get_backend
+
+    # Cached responses, users & throttling history (`CacheThrottleBackend`
+    # counters go with the cache) must not leak between tests
+    sqlite_throttle_backend = get_backend(
+        "api.throttling.SQLiteThrottleBackend"
+    )
+    cache.clear()
+    _users.clear()
+    sqlite_throttle_backend.clear()
+    yield
+    cache.clear()
+    _users.clear()
+    sqlite_throttle_backend.clear()
+
+
+@pytest.fixture(scope="session")
+def django_db_setup(django_db_setup, django_db_blocker):
+    # Tests run with `--nomigrations`: install the extensions migrations would
+    # have created, when the server provides them.
+    with django_db_blocker.unblock(), connection.cursor() as cursor:
+        try:
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        except DatabaseError:
+            pass
+
+
+@pytest.fixture(scope="session")
+def django_db_modify_db_settings(django_db_modify_db_settings_parallel_suffix):
+    # A second local database stands in for a read replica, for the tests
+    # using the "replica" alias (see `cinema.routers`)
+    from django.conf import settings
+
+    default = settings.DATABASES["default"]
+    settings.DATABASES["replica"] = {
+        **default,
+        "TEST": {
+            **default.get("TEST", {}),
+            "NAME": f"test_{default['NAME']}_replica",
+        },
+    }
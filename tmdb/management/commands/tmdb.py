@@ -4,9 +4,11 @@ from typing import Dict, List, Set
 
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
-from django.db.models import Value
+from django.db.models import F, Value
 from django.db.models.functions import Concat
+from django.utils import timezone
 
+from cinema.cache import bump_generations
 from cinema.models import (
     Author,
     CreationSource,
@@ -14,6 +16,7 @@ from cinema.models import (
     MovieEvaluation,
     MovieStatus,
 )
+from cinema.routers import use_primary
 from tmdb import client
 
 
@@ -40,12 +43,28 @@ class Command(BaseCommand):
         parser.add_argument("stage", choices=["populate", "expand"])
 
     def handle(self, stage, **opts):
+        # Rows are looked up to be updated or linked right after: reading
+        # them from a lagging replica would miss the latest ones
+        with use_primary():
+            self.run(stage)
+
+    def run(self, stage):
         self.client = client.TMDBClient(stdout=self.stdout, style=self.style)
+        # Authors created or updated by this run
+        self.written_authors = set()
         if stage == "populate":
             self.seed()
         else:
             self.expand()
 
+        # Rows are written with `update()` / `bulk_create()` which don't send
+        # model signals: refresh search vectors and invalidate cached API
+        # responses explicitly.
+        Author.refresh_search_vectors(
+            Author.objects.filter(pk__in=self.written_authors)
+        )
+        bump_generations(Movie, Author)
+
     def expand(
         self,
         authors_to_expand: List[client.AuthorFromTMDB] = list(),
@@ -131,7 +150,7 @@ class Command(BaseCommand):
             newly_detected_authors_tmdb_id
         ):
             try:
-                Author.objects.create(
+                author = Author.objects.create(
                     biography=tmdb_author.biography,
                     birth_day=tmdb_author.birthday,
                     creation_source=CreationSource.TMDB,
@@ -143,6 +162,7 @@ class Command(BaseCommand):
                     tmdb_id=tmdb_author.tmdb_id,
                     tmdb_population_date=tmdb_author.fetch_datetime,
                 )
+                self.written_authors.add(author.pk)
                 stats.created_authors += 1
 
             except Exception as e:
@@ -242,6 +262,9 @@ class Command(BaseCommand):
                 title=tmdb_movie.title,
                 tmdb_id=tmdb_movie.tmdb_id,
                 tmdb_population_date=tmdb_movie.fetch_datetime,
+                # `update()` bypasses `VersionedModel.save()`
+                version=F("version") + 1,
+                updated_at=timezone.now(),
             )
             movies_to_expand.append(tmdb_movie)
             stats.updated_movies += 1
@@ -262,7 +285,14 @@ class Command(BaseCommand):
                 imdb_id=tmdb_author.imdb_id,
                 tmdb_id=tmdb_author.tmdb_id,
                 tmdb_population_date=tmdb_author.fetch_datetime,
+                version=F("version") + 1,
+                updated_at=timezone.now(),
             )
+            # Their movies embed the author name
+            Movie.touch(
+                Movie.objects.filter(authors=tmdb_author.db_id).values("pk")
+            )
+            self.written_authors.add(tmdb_author.db_id)
             stats.updated_authors += 1
             authors_to_expand.append(tmdb_author)
 
@@ -343,6 +373,10 @@ class Command(BaseCommand):
 
         Through.objects.bulk_create(rows, ignore_conflicts=True)
 
+        # Both sides details embed the other one
+        Movie.touch({movie_id for movie_id, _ in pairs})
+        Author.touch({author_id for _, author_id in pairs})
+
     def print_success(self, stats: CommandStats):
         self.stdout.write(
             self.style.SUCCESS(f"""Successfully populated DB with TMDB data: